@@ -0,0 +1,29 @@
+import queue
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+class AgentPool:
+    """Agent sets built once and reused by every run in the process.
+
+    Each run leases a whole set, so two concurrent runs never share an agent
+    (agents keep per-task executor state). A new set is built only when every
+    existing one is leased.
+    """
+
+    def __init__(self, build: Callable[[], Any]):
+        self.build = build
+        self.size = 0
+        self._idle: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        try:
+            agents = self._idle.get_nowait()
+        except queue.Empty:
+            agents = self.build()
+            self.size += 1
+        try:
+            yield agents
+        finally:
+            self._idle.put(agents)
@@ -1,56 +1,165 @@
+import time
+
+_script_started = time.perf_counter()  # the rerun profiler counts the imports below as part of each run
+
 import streamlit as st
 import os
-from crewai import Agent, Task, Crew, Process, LLM
-from crewai_tools import SerperDevTool
+import hashlib
+import logging
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
+from agent_pool import AgentPool
+from jobs import JobQueue, QueueFull
+from llm_cache import CompletionCache
+from profiling import profiler
+from result_store import ResultStore
+
+# crewai, crewai_tools and the modules built on them take seconds to import, so they are
+# imported where first used and preloaded in the background once per process.
+HEAVY_MODULES = ("crewai", "crewai_tools", "fanout", "streaming", "tracing")
+
+@st.cache_resource
+def preload_heavy_modules():
+    def load():
+        for name in HEAVY_MODULES:
+            profiler.timed_import(name)
+
+    thread = threading.Thread(target=load, name="preload", daemon=True)
+    thread.start()
+    return thread
 
 # Environment variables
 CLARIFAI_PAT = os.getenv("CLARIFAI_PAT")
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 
-if not CLARIFAI_PAT:
-    st.error("Please set CLARIFAI_PAT environment variable")
-    st.stop()
-
-if not SERPER_API_KEY:
-    st.error("Please set SERPER_API_KEY environment variable")
-    st.stop()
+def missing_environment():
+    """Names of required environment variables that are not set"""
+    return [name for name, value in (("CLARIFAI_PAT", CLARIFAI_PAT), ("SERPER_API_KEY", SERPER_API_KEY)) if not value]
 
 # Configure Clarifai LLM
-clarifai_llm = LLM(
-    model="openai/gcp/generate/models/gemini-2_5-pro",
-    api_key=CLARIFAI_PAT,
-    base_url="https://api.clarifai.com/v2/ext/openai/v1"
+LLM_MODEL = "openai/gcp/generate/models/gemini-2_5-pro"
+LLM_BASE_URL = os.getenv("CLARIFAI_BASE_URL", "https://api.clarifai.com/v2/ext/openai/v1")
+
+# Prompt-level completion cache in front of every LLM client. Deterministic mode pins
+# temperature and seed so that a replayed run reproduces the original exactly.
+LLM_CACHE_ENABLED = os.getenv("BLOG_LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv(
+    "BLOG_LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm.sqlite")
 )
+LLM_CACHE_MAX_BYTES = int(os.getenv("BLOG_LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_DETERMINISTIC = os.getenv("BLOG_LLM_DETERMINISTIC", "0") == "1"
+LLM_SAMPLING = {"temperature": 0, "seed": int(os.getenv("BLOG_LLM_SEED", "0"))} if LLM_DETERMINISTIC else {}
 
-# Initialize tools
-search_tool = SerperDevTool()
+@st.cache_resource
+def get_llm_cache():
+    return CompletionCache(LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES)
 
-# Define Agents
-researcher = Agent(
-    role="Senior Research Analyst",
-    goal="Uncover cutting-edge developments and facts on a given topic",
-    backstory="""You are a meticulous and insightful research analyst working at a leading tech think tank.
-    Your expertise lies in identifying emerging trends, gathering verified information,
-    and presenting actionable insights clearly and concisely.""",
-    tools=[search_tool],
-    verbose=True,
-    allow_delegation=False,
-    llm=clarifai_llm
+def create_llm(stream=False, agent="llm"):
+    """Create a Clarifai LLM client; ``agent`` labels its calls in the cache statistics"""
+    from crewai import LLM
+
+    llm = LLM(
+        model=LLM_MODEL,
+        api_key=CLARIFAI_PAT,
+        base_url=LLM_BASE_URL,
+        stream=stream,
+        **LLM_SAMPLING
+    )
+    return get_llm_cache().wrap(llm, agent) if LLM_CACHE_ENABLED else llm
+
+# Generated posts are memoized on disk, keyed by topic, model and prompt version
+RESULT_CACHE_PATH = os.getenv(
+    "BLOG_RESULT_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "results.sqlite")
 )
+RESULT_CACHE_TTL = float(os.getenv("BLOG_RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("BLOG_RESULT_CACHE_MAX_ENTRIES", "500"))
 
-writer = Agent(
-    role="Tech Content Strategist",
-    goal="Craft compelling and engaging blog posts on technical topics",
-    backstory="""You are a renowned Content Strategist, known for your insightful and engaging articles.
-    You transform complex concepts and research findings into compelling narratives
-    that are accessible to a tech-savvy audience.""",
-    verbose=True,
-    allow_delegation=True,
-    llm=clarifai_llm
+# Per-stage tracing: spans are appended to a JSON lines file and summed into Prometheus metrics
+TRACE_LOG_PATH = os.getenv(
+    "BLOG_TRACE_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "traces.jsonl")
 )
+METRICS_PORT = int(os.getenv("BLOG_METRICS_PORT", "9464"))  # 0 disables the /metrics endpoint
+
+# Fan-out mode outlines the post, writes its sections concurrently, then the writer stitches them together
+FANOUT_MAX_SECTIONS = int(os.getenv("BLOG_FANOUT_MAX_SECTIONS", "6"))
+
+# Background generation: bounded workers shared by all sessions, with a bounded queue in front of them
+JOB_WORKERS = int(os.getenv("BLOG_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("BLOG_JOB_QUEUE_SIZE", "8"))
+JOB_POLL_INTERVAL = 2  # seconds between status checks while a job is pending
+
+@st.cache_resource
+def get_search_tool():
+    from crewai_tools import SerperDevTool
+
+    return SerperDevTool()
+
+@st.cache_resource
+def get_section_llm():
+    """LLM client shared by the fan-out section writers"""
+    return create_llm(agent="section writer")
+
+# Define Agents
+def create_agents(llm, writer_llm, search_tool=None):
+    """Create the researcher and writer agents"""
+    from crewai import Agent
+
+    researcher = Agent(
+        role="Senior Research Analyst",
+        goal="Uncover cutting-edge developments and facts on a given topic",
+        backstory="""You are a meticulous and insightful research analyst working at a leading tech think tank.
+        Your expertise lies in identifying emerging trends, gathering verified information,
+        and presenting actionable insights clearly and concisely.""",
+        tools=[search_tool or get_search_tool()],
+        verbose=True,
+        allow_delegation=False,
+        llm=llm
+    )
+
+    writer = Agent(
+        role="Tech Content Strategist",
+        goal="Craft compelling and engaging blog posts on technical topics",
+        backstory="""You are a renowned Content Strategist, known for your insightful and engaging articles.
+        You transform complex concepts and research findings into compelling narratives
+        that are accessible to a tech-savvy audience.""",
+        verbose=True,
+        allow_delegation=True,
+        llm=writer_llm
+    )
+
+    return researcher, writer
+
+def create_section_writer():
+    """A writer for one section in fan-out mode; every section gets its own agent"""
+    from crewai import Agent
+
+    return Agent(
+        role="Tech Section Writer",
+        goal="Write one section of a technical blog post from its outline points and the research",
+        backstory="""You are a technical writer who turns a single outline section into focused,
+        engaging prose for a tech-savvy audience.""",
+        verbose=True,
+        allow_delegation=False,
+        llm=get_section_llm()
+    )
 
-def create_tasks(topic):
-    """Create research and writing tasks for the given topic"""
+@st.cache_resource
+def get_agent_pool():
+    """Researcher/writer pairs shared by all sessions; the writer streams so its tokens can be shown live"""
+    return AgentPool(lambda: create_agents(create_llm(agent="researcher"), create_llm(stream=True, agent="writer")))
+
+def create_tasks(topic, agents=None):
+    """Create research and writing tasks for the given topic
+
+    ``agents`` is a ``(researcher, writer)`` pair; runs that execute concurrently
+    must each lease their own pair from ``get_agent_pool``. Without agents the
+    tasks are only good for inspecting their prompts.
+    """
+    from crewai import Task
+
+    researcher, writer = agents or (None, None)
     research_task = Task(
         description=f"""Conduct a comprehensive analysis of '{topic}'.
         Identify key trends, breakthrough technologies, important figures, and potential industry impacts.
@@ -79,22 +188,258 @@ def create_tasks(topic):
     
     return research_task, writing_task
 
-def run_blog_generation(topic):
-    """Run the blog generation crew for the given topic"""
-    research_task, writing_task = create_tasks(topic)
-    
-    crew = Crew(
-        agents=[researcher, writer],
+def create_outline_tasks(topic, agents=None):
+    """Create the research and outline tasks that precede the fan-out crew"""
+    from crewai import Task
+    from fanout import OUTLINE_FORMAT
+
+    research_task, _ = create_tasks(topic, agents)
+    writer = agents[1] if agents else None
+    outline_task = Task(
+        description=f"""Using the research on '{topic}', outline an engaging blog post for a tech-savvy audience:
+        an introduction, 3-4 body sections with the key points each should cover, and a conclusion.
+        """ + OUTLINE_FORMAT,
+        expected_output="A blog post outline with one SECTION line and a few bullet points per section.",
+        agent=writer,
+        context=[research_task]
+    )
+    return research_task, outline_task
+
+def create_stitch_task(topic, research_task, section_tasks, writer):
+    """Create the task that joins the separately written sections into the final post"""
+    from crewai import Task
+
+    return Task(
+        description=f"""The sections of the blog post on '{topic}' were written separately and are given in order.
+        Join them into one engaging blog post with a clear introduction, body, and conclusion.
+        Keep the section order and their content, add short transitions where sections meet,
+        and remove repetition between sections so the post reads as one logical flow.
+
+        IMPORTANT: Format the output as proper markdown with:
+        - A compelling title using # 
+        - Section headers using ##
+        - Proper paragraph breaks
+        - Bullet points where appropriate
+        - Bold text for emphasis using **text**
+        - No code blocks or triple backticks in the output""",
+        expected_output="A well-written blog post of at least 4 paragraphs, formatted in clean markdown.",
+        agent=writer,
+        context=[research_task, *section_tasks]
+    )
+
+@st.cache_data(show_spinner=False)
+def prompt_version(fanout=False):
+    """Hash of the task prompts, so editing them invalidates memoized posts"""
+    from fanout import create_section_tasks
+
+    tasks = create_tasks("{topic}")
+    if fanout:
+        research_task, outline_task = create_outline_tasks("{topic}")
+        section_tasks = create_section_tasks("{topic}", [("{heading}", "{points}")], lambda: None)
+        tasks += (outline_task, *section_tasks, create_stitch_task("{topic}", research_task, [], None))
+    prompts = "\x1f".join(f"{task.description}\x1e{task.expected_output}" for task in tasks)
+    return hashlib.sha256(prompts.encode("utf-8")).hexdigest()[:16]
+
+@st.cache_resource
+def get_result_store():
+    return ResultStore(RESULT_CACHE_PATH, RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES)
+
+@st.cache_resource
+def get_tracer():
+    from tracing import Tracer
+
+    tracer = Tracer(TRACE_LOG_PATH)
+    if METRICS_PORT:
+        try:
+            tracer.serve_metrics(METRICS_PORT)
+        except OSError as e:
+            logging.warning("Metrics endpoint not started on port %s: %s", METRICS_PORT, e)
+    return tracer
+
+def create_crew(topic, agents):
+    """Create the research and writing crew for the given topic"""
+    from crewai import Crew, Process
+
+    research_task, writing_task = create_tasks(topic, agents)
+
+    return Crew(
+        agents=[research_task.agent, writing_task.agent],
         tasks=[research_task, writing_task],
         process=Process.sequential,
         verbose=1
     )
-    result = crew.kickoff()
+
+def create_outline_crew(topic, agents):
+    """Create the research → outline crew that precedes the fan-out crew"""
+    from crewai import Crew, Process
+
+    research_task, outline_task = create_outline_tasks(topic, agents)
+
+    return Crew(
+        agents=[research_task.agent, outline_task.agent],
+        tasks=[research_task, outline_task],
+        process=Process.sequential,
+        verbose=1
+    )
+
+def create_fanout_crew(topic, outline_crew):
+    """Create the crew that writes each outline section concurrently and then stitches the post
+
+    Returns the crew and the ``(heading, points)`` sections it writes.
+    """
+    from crewai import Crew, Process
+    from fanout import create_section_tasks, split_outline
+
+    research_task, outline_task = outline_crew.tasks
+    sections = split_outline(outline_task.output.raw, FANOUT_MAX_SECTIONS)
+    section_tasks = create_section_tasks(topic, sections, create_section_writer, context=[research_task])
+    stitch_task = create_stitch_task(topic, research_task, section_tasks, outline_task.agent)
+
+    crew = Crew(
+        agents=[task.agent for task in section_tasks] + [stitch_task.agent],
+        tasks=[*section_tasks, stitch_task],
+        process=Process.sequential,
+        verbose=1
+    )
+    return crew, sections
+
+def traced_kickoff(crew, topic, traces=None, fresh=False):
+    """``crew.kickoff()`` recorded as a traced run, appended to ``traces`` when a list is given
+
+    With ``fresh`` every LLM call goes to the model instead of the completion cache.
+    """
+    bypass = get_llm_cache().bypass(crew) if fresh and LLM_CACHE_ENABLED else nullcontext()
+    with get_tracer().trace_run(crew, topic) as trace, bypass:
+        if traces is not None:
+            traces.append(trace)
+        return crew.kickoff()
+
+def run_blog_generation(topic, agents=None, traces=None, fanout=False, fresh=False):
+    """Run the blog generation crew for the given topic
+
+    The run is traced; its ``RunTrace`` is appended to ``traces`` when a list is given.
+    With ``fanout`` the research and outline run first, then the outline's
+    sections are written concurrently and the writer stitches them together.
+    Without ``agents`` a pair is leased from the agent pool for the run.
+    """
+    if agents is None:
+        with get_agent_pool().lease() as agents:
+            return run_blog_generation(topic, agents, traces, fanout, fresh)
+
+    if fanout:
+        outline_crew = create_outline_crew(topic, agents)
+        traced_kickoff(outline_crew, topic, traces, fresh)
+        crew, _ = create_fanout_crew(topic, outline_crew)
+    else:
+        crew = create_crew(topic, agents)
+    result = traced_kickoff(crew, topic, traces, fresh)
     
     return result
 
+def memoized_blog_generation(topic, generate, regenerate=False, fanout=False):
+    """Serve a stored post for the topic unless ``regenerate`` is set; otherwise run ``generate``
+
+    Posts written in fan-out mode are stored separately from single-pass posts.
+
+    Returns ``(post, created_at)`` where ``created_at`` is None for a fresh run.
+    """
+    store = get_result_store()
+    key = ResultStore.key(topic, LLM_MODEL, prompt_version(fanout))
+    if not regenerate:
+        cached = store.get(key)
+        if cached is not None:
+            return cached
+
+    post = str(generate(topic))
+    store.put(key, topic, post)
+    return post, None
+
+def stream_blog_generation(topic, traces=None, fanout=False, fresh=False):
+    """Run the crew with live stage progress and the post streamed in as it is written"""
+    from streaming import render_crew_stream
+
+    with get_agent_pool().lease() as agents:
+        if fanout:
+            outline_crew = create_outline_crew(topic, agents)
+            render_crew_stream(
+                outline_crew, ["🔍 Research", "🗂️ Outline"],
+                kickoff=lambda: traced_kickoff(outline_crew, topic, traces, fresh)
+            )
+            crew, sections = create_fanout_crew(topic, outline_crew)
+            labels = [f"✍️ Writing: {heading}" for heading, _ in sections] + ["🧵 Stitching"]
+        else:
+            crew = create_crew(topic, agents)
+            labels = ["🔍 Research", "✍️ Writing"]
+
+        return render_crew_stream(
+            crew, labels, stream_llm=agents[1].llm, kickoff=lambda: traced_kickoff(crew, topic, traces, fresh)
+        )
+
+def run_job(job):
+    """Generate the post for a background job with agents leased from the pool"""
+    options = job.options
+    generate = partial(run_blog_generation, traces=job.traces, fanout=options["fanout"], fresh=options["regenerate"])
+    post, _ = memoized_blog_generation(job.topic, generate, regenerate=options["regenerate"], fanout=options["fanout"])
+    return post
+
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(run_job, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE)
+
+def show_post(topic, result, created_at=None):
+    st.success("✅ Blog post generated successfully!")
+    if created_at is not None:
+        saved = datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M")
+        st.caption(f"Served from saved results ({saved}). Tick ♻️ Regenerate for a fresh post.")
+    st.markdown("---")
+    
+    # Display the result as markdown
+    st.markdown(result)
+    
+    # Download option
+    st.download_button(
+        label="📥 Download as Markdown",
+        data=result,
+        file_name=f"{topic.replace(' ', '_').lower()}_blog.md",
+        mime="text/markdown"
+    )
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def poll_job(job):
+    """Show a pending job's progress, rerunning the page once it finishes"""
+    if job.done:
+        st.rerun()
+    if job.status == "queued":
+        st.info(f"⏳ Queued behind {get_job_queue().position(job)} other post(s).")
+    else:
+        st.info(f"🧠 AI agents are working on: '{job.topic}' ({time.time() - job.started:.0f}s)...")
+        for trace in job.traces:
+            for span in [span for span in trace.spans if span["kind"] == "task"]:
+                st.write(f"{'✅' if span['end'] else '▶️'} {span['name']}")
+    st.caption(f"Job `{job.id}`: you can leave this page and open this URL again later to get the post.")
+
+def show_job(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.warning(f"Job `{job_id}` was not found. Finished posts are kept for an hour.")
+    elif not job.done:
+        poll_job(job)
+    else:
+        if job.traces:
+            st.session_state["last_trace"] = job.traces[-1]
+        if job.status == "failed":
+            st.error(f"An error occurred: {job.error}")
+        else:
+            show_post(job.topic, job.result)
+
 # Streamlit App
 def main():
+    for name in missing_environment():
+        st.error(f"Please set {name} environment variable")
+    if missing_environment():
+        st.stop()
+    preload_heavy_modules()
+
     st.title("📝 AI Blog Writing Agent")
     st.markdown("*Powered by Clarifai & CrewAI*")
 
@@ -118,35 +463,64 @@ def main():
         col1, col2 = st.columns([1, 4])
         with col1:
             generate_button = st.button("🚀 Generate Blog", type="primary")
+        with col2:
+            background = st.toggle(
+                "Run in background", value=True,
+                help="Queue the post and fetch it from this page's URL later, even after leaving the page"
+            )
+            stream_output = st.toggle("Stream progress and output", value=True, disabled=background)
+            fanout = st.toggle(
+                "Write sections in parallel", value=False,
+                help="Outline the post, write each section concurrently, then stitch them into one post"
+            )
+            regenerate = st.checkbox("♻️ Regenerate (ignore saved result)", value=False)
 
     # Generation section
     if generate_button:
         if not topic.strip():
             st.error("Please enter a topic for the blog post.")
+        elif background:
+            try:
+                job = get_job_queue().submit(topic, fanout=fanout, regenerate=regenerate)
+            except QueueFull as e:
+                st.error(f"⏳ The server is busy, please try again shortly ({e}).")
+            else:
+                st.query_params["job"] = job.id
         else:
+            profiler.mark_generation()
             with st.spinner(f"🧠 AI agents are working on: '{topic}'..."):
                 try:
-                    result = run_blog_generation(topic)
-                    
-                    st.success("✅ Blog post generated successfully!")
-                    st.markdown("---")
-                    
-                    # Display the result as markdown
-                    st.markdown(result)
-                    
-                    # Download option
-                    st.download_button(
-                        label="📥 Download as Markdown",
-                        data=result,
-                        file_name=f"{topic.replace(' ', '_').lower()}_blog.md",
-                        mime="text/markdown"
+                    traces = []
+                    generate = stream_blog_generation if stream_output else run_blog_generation
+                    result, created_at = memoized_blog_generation(
+                        topic, partial(generate, traces=traces, fanout=fanout, fresh=regenerate),
+                        regenerate=regenerate, fanout=fanout
                     )
+                    if traces:
+                        st.session_state["last_trace"] = traces[-1]
+                    show_post(topic, result, created_at)
                     
                 except Exception as e:
                     st.error(f"An error occurred: {str(e)}")
 
+    # A background job started here or in an earlier visit to this URL
+    if "job" in st.query_params and (background or not generate_button):
+        show_job(st.query_params["job"])
+
     # Sidebar
     with st.sidebar:
+        if "last_trace" in st.session_state:
+            st.header("⏱️ Last Run")
+            from tracing import render_waterfall
+
+            render_waterfall(st.session_state["last_trace"])
+
+        if LLM_CACHE_ENABLED and get_llm_cache().stats():
+            st.header("🧠 LLM Cache")
+            for agent, counts in get_llm_cache().stats().items():
+                calls = counts["hits"] + counts["misses"]
+                st.markdown(f"- **{agent}:** {counts['hit_rate']:.0%} hits ({counts['hits']}/{calls} calls)")
+
         st.header("ℹ️ Information")
         
         st.markdown("**Environment Variables Required:**")
@@ -161,9 +535,26 @@ def main():
         st.markdown("- Real-time web research")
         st.markdown("- AI-powered content writing")
         st.markdown("- Markdown formatted output")
+        st.markdown("- Live progress and streamed output")
+        st.markdown("- Background generation you can come back to")
+        st.markdown("- Optional parallel section writing")
         st.markdown("- Download capability")
         
         st.warning("⚠️ Keep your API keys secure and never commit them to version control.")
 
+        with st.expander("🐢 Startup & rerun profile"):
+            summary = profiler.summary()
+            st.markdown(f"- **First run:** {summary['cold_start_ms']:.0f} ms")
+            if summary["reruns"]:
+                st.markdown(
+                    f"- **Rerun overhead:** p50 {summary['rerun_p50_ms']:.0f} ms, "
+                    f"p95 {summary['rerun_p95_ms']:.0f} ms, last {summary['last_rerun_ms']:.0f} ms "
+                    f"({summary['reruns']} reruns)"
+                )
+            for name, ms in summary["imports_ms"].items():
+                st.markdown(f"- **import {name}:** {ms:.0f} ms")
+            st.markdown(f"- **Agent sets built:** {get_agent_pool().size}")
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with profiler.rerun(_script_started):
+        main() 
\ No newline at end of file
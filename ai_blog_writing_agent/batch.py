@@ -0,0 +1,147 @@
+"""Headless batch generation of blog posts.
+
+Reads topics from a JSONL (``{"topic": ...}`` per line) or CSV (``topic``
+column) file, runs several crews concurrently and writes each post to the
+output directory as soon as it is finished. Progress is checkpointed to
+``<out>/checkpoint.jsonl`` so an interrupted batch resumes where it left off.
+
+    python batch.py topics.jsonl --out posts --concurrency 3 --llm-rpm 30
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import app  # noqa: E402  (quiet Streamlit's "no script run context" warnings first)
+
+logger = logging.getLogger("batch")
+
+
+class RateLimiter:
+    """Token bucket shared by every crew in the batch, refilled at ``per_minute`` calls per minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self.capacity = max(per_minute / 6.0, 1.0)  # allow ~10 seconds of burst
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) / self.interval)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.interval
+            time.sleep(wait)
+
+    def wrap(self, llm):
+        """Make every model call wait for a token first; completion-cache hits are not limited."""
+        name = "uncached_call" if hasattr(llm, "uncached_call") else "call"
+        call = getattr(llm, name)
+
+        def limited_call(*args, **kwargs):
+            self.acquire()
+            return call(*args, **kwargs)
+
+        setattr(llm, name, limited_call)
+        return llm
+
+
+def read_topics(path):
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            topics = [row["topic"] for row in csv.DictReader(f)]
+    else:
+        with open(path, encoding="utf-8") as f:
+            topics = [json.loads(line)["topic"] for line in f if line.strip()]
+    return list(dict.fromkeys(topic.strip() for topic in topics if topic.strip()))
+
+
+def slugify(topic):
+    """File name stem for ``topic``; the hash keeps topics that read alike from overwriting each other"""
+    slug = re.sub(r"[^a-z0-9]+", "_", topic.lower()).strip("_")[:80] or "untitled"
+    return f"{slug}_{hashlib.sha1(topic.encode('utf-8')).hexdigest()[:8]}"
+
+
+def load_checkpoint(path):
+    """Topics already written by a previous run of this batch"""
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["status"] == "done":
+                    done.add(entry["topic"])
+    return done
+
+
+def generate(topic, out_dir, limiter):
+    # Each crew gets its own agents and LLM clients; agents are not safe to share between concurrent runs.
+    agents = app.create_agents(
+        limiter.wrap(app.create_llm(agent="researcher")), limiter.wrap(app.create_llm(agent="writer"))
+    )
+    started = time.monotonic()
+    post = str(app.run_blog_generation(topic, agents))
+    path = os.path.join(out_dir, f"{slugify(topic)}.md")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(post)
+    os.replace(path + ".tmp", path)
+    return path, time.monotonic() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate blog posts for a list of topics without the UI.")
+    parser.add_argument("topics", help="JSONL file with a 'topic' field per line, or CSV with a 'topic' column")
+    parser.add_argument("--out", default="posts", help="Directory for the generated markdown files")
+    parser.add_argument("--concurrency", type=int, default=3, help="Number of crews running at once")
+    parser.add_argument("--llm-rpm", type=float, default=30, help="Global limit on LLM calls per minute")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    missing = app.missing_environment()
+    if missing:
+        parser.error(f"Please set {', '.join(missing)} environment variable(s)")
+
+    os.makedirs(args.out, exist_ok=True)
+    checkpoint_path = os.path.join(args.out, "checkpoint.jsonl")
+    done = load_checkpoint(checkpoint_path)
+    topics = [topic for topic in read_topics(args.topics) if topic not in done]
+    logger.info("%d topics to generate, %d already done", len(topics), len(done))
+
+    limiter = RateLimiter(args.llm_rpm)
+    failures = 0
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = {pool.submit(generate, topic, args.out, limiter): topic for topic in topics}
+        for future in as_completed(futures):
+            topic = futures[future]
+            try:
+                path, elapsed = future.result()
+                entry = {"topic": topic, "status": "done", "file": path, "seconds": round(elapsed, 1)}
+                logger.info("Wrote %s (%.1fs)", path, elapsed)
+            except Exception as e:
+                failures += 1
+                entry = {"topic": topic, "status": "failed", "error": str(e)}
+                logger.error("Failed on %r: %s", topic, e)
+            checkpoint.write(json.dumps(entry) + "\n")
+            checkpoint.flush()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# Copied, not imported: ai_blog_writing_agent/ and mcp_powered_ai_blog_writing_agent/ are
+# each run on their own from their directory, so both keep this module. Keep the copies identical.
+
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+from crewai import Task
+
+# Asked of the outlining agent in fan-out mode so sections can be found reliably.
+SECTION_MARKER = "SECTION:"
+OUTLINE_FORMAT = f"""
+Start every section of the outline (introduction, each body section and conclusion)
+on its own line as `{SECTION_MARKER} <section heading>`, followed by that section's bullet points.
+"""
+
+_HEADING_PATTERNS = [
+    re.compile(rf"^\s*\**{re.escape(SECTION_MARKER)}\**\s*(.+?)\s*$", re.IGNORECASE),
+    re.compile(r"^\s{0,3}#{2,4}\s+(.+?)\s*#*\s*$"),
+    re.compile(r"^(?:\d+|[IVX]+)[.)]\s+(.+?)\s*$"),
+]
+
+
+def split_outline(outline: str, max_sections: int = 6) -> List[Tuple[str, str]]:
+    """Split an outline into ``(heading, points)`` sections, at most ``max_sections`` of them.
+
+    Sections are found by ``SECTION:`` markers, falling back to ``##`` headings
+    and then to top-level numbered items. Surplus sections are merged into their
+    neighbours; an outline without recognisable sections is one section.
+    """
+    lines = outline.splitlines()
+    for pattern in _HEADING_PATTERNS:
+        starts = [(i, m.group(1).strip("*: ")) for i, line in enumerate(lines) if (m := pattern.match(line))]
+        if len(starts) >= 2:
+            break
+    else:
+        return [("Full post", outline.strip())]
+
+    sections = []
+    for n, (i, heading) in enumerate(starts):
+        end = starts[n + 1][0] if n + 1 < len(starts) else len(lines)
+        sections.append((heading, "\n".join(lines[i + 1:end]).strip()))
+
+    # Merge consecutive sections into evenly sized groups when there are too many.
+    groups = max(1, max_sections)
+    if len(sections) > groups:
+        size = -(-len(sections) // groups)
+        sections = [
+            (" / ".join(h for h, _ in chunk), "\n\n".join(f"{h}:\n{p}" for h, p in chunk))
+            for chunk in (sections[k:k + size] for k in range(0, len(sections), size))
+        ]
+    return sections
+
+
+def create_section_tasks(
+    topic: str,
+    sections: List[Tuple[str, str]],
+    make_writer: Callable[[], Any],
+    context: Optional[List[Task]] = None,
+) -> List[Task]:
+    """One asynchronous writing task per section, each with its own writer agent.
+
+    Consecutive async tasks run concurrently in a sequential crew; the next
+    synchronous task waits for all of them. Agents are not shared between the
+    tasks because an agent keeps per-task executor state.
+    """
+    outline = "\n".join(f"- {heading}" for heading, _ in sections)
+    return [
+        Task(
+            description=f"""
+You are writing one section of a blog post on "{topic}". The full post has these sections:
+{outline}
+
+Write only the section "{heading}", covering:
+{points or "- the points implied by the heading"}
+
+- 1–3 paragraphs, engaging and informative
+- Use examples and factual support from the research where possible
+- Start with `## {heading}` and use clean markdown
+- Do not write the other sections, a title, or a summary of the whole post
+""",
+            expected_output=f"The markdown text of the \"{heading}\" section only.",
+            agent=make_writer(),
+            context=context or [],
+            async_execution=True
+        )
+        for heading, points in sections
+    ]
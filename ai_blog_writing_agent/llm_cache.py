@@ -0,0 +1,139 @@
+# Copied, not imported: ai_blog_writing_agent/ and mcp_powered_ai_blog_writing_agent/ are
+# each run on their own from their directory, so both keep this module. Keep the copies identical.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# LLM attributes that change what the model returns for the same messages
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "n", "stop", "max_tokens", "max_completion_tokens", "presence_penalty",
+    "frequency_penalty", "logit_bias", "response_format", "seed", "reasoning_effort",
+)
+
+
+class CompletionCache:
+    """On-disk cache of LLM completions in front of ``LLM.call``.
+
+    Entries are keyed on the model, the messages and the sampling parameters,
+    so retrying a run (or re-running it after editing a later prompt) replays
+    every unchanged call without contacting the model. The store is bounded to
+    ``max_bytes`` of completions and evicts the least recently used first.
+    Hits and misses are counted per agent role.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, model TEXT, completion TEXT, size INTEGER, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._bypass: set = set()
+        self._local = threading.local()
+
+    @staticmethod
+    def key(model: str, messages: Any, params: Dict[str, Any]) -> str:
+        raw = json.dumps([model, messages, params], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT completion FROM completions WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._db.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+        return row[0] if row else None
+
+    def put(self, key: str, model: str, completion: str) -> None:
+        size = len(completion.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)", (key, model, completion, size, time.time())
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        expired = []
+        for old_key, old_size in self._db.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            expired.append((old_key,))
+            total -= old_size
+        self._db.executemany("DELETE FROM completions WHERE key = ?", expired)
+
+    @contextmanager
+    def bypass(self, crew) -> Iterator[None]:
+        """Skip cache reads (but still store results) for the calls made by ``crew``'s tasks"""
+        task_ids = {id(task) for task in crew.tasks}
+        with self._lock:
+            self._bypass |= task_ids
+        self._local.bypass = True
+        try:
+            yield
+        finally:
+            self._local.bypass = False
+            with self._lock:
+                self._bypass -= task_ids
+
+    def _bypassed(self, from_task: Any) -> bool:
+        if from_task is not None:
+            with self._lock:
+                return id(from_task) in self._bypass
+        return getattr(self._local, "bypass", False)
+
+    def wrap(self, llm, agent: str = "llm"):
+        """Serve ``llm.call`` from the cache; ``agent`` names calls that do not say which agent made them.
+
+        The uncached call stays available as ``llm.uncached_call`` so that
+        other wrappers (rate limits, quotas) can be applied to real model calls only.
+        """
+        llm.uncached_call = llm.call
+
+        def cached_call(messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+            if tools or available_functions:  # native function calling has side effects; always call the model
+                return llm.uncached_call(messages, tools, callbacks, available_functions, **kwargs)
+            role = getattr(kwargs.get("from_agent"), "role", None) or agent
+            params = {name: getattr(llm, name, None) for name in SAMPLING_PARAMS}
+            key = self.key(llm.model, messages, params)
+            if not self._bypassed(kwargs.get("from_task")):
+                completion = self.get(key)
+                if completion is not None:
+                    self._count(role, "hits")
+                    return completion
+            self._count(role, "misses")
+            completion = llm.uncached_call(messages, tools, callbacks, available_functions, **kwargs)
+            if isinstance(completion, str) and completion:
+                self.put(key, llm.model, completion)
+            return completion
+
+        llm.call = cached_call
+        return llm
+
+    def _count(self, role: str, outcome: str) -> None:
+        with self._lock:
+            self._stats[role][outcome] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Hits, misses and hit rate per agent role since the process started"""
+        with self._lock:
+            return {
+                role: {**counts, "hit_rate": round(counts["hits"] / max(counts["hits"] + counts["misses"], 1), 3)}
+                for role, counts in self._stats.items()
+            }
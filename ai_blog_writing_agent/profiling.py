@@ -0,0 +1,82 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+class Profiler:
+    """Startup and per-rerun timings of the Streamlit script.
+
+    Streamlit re-executes the app script on every interaction but imports
+    this module only once, so the numbers collected here span the process.
+    Reruns that generated a post are counted separately from interaction
+    overhead.
+    """
+
+    def __init__(self, keep: int = 500):
+        self.imports: Dict[str, float] = {}
+        self.cold_start: Optional[float] = None
+        self.generations = 0
+        self._reruns: "deque[float]" = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def timed_import(self, name: str) -> Any:
+        """Import ``name``, recording how long the first import took"""
+        if name in sys.modules:
+            return sys.modules[name]
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        with self._lock:
+            self.imports.setdefault(name, time.perf_counter() - started)
+        return module
+
+    @contextmanager
+    def rerun(self, started: float) -> Iterator[None]:
+        """Time one script run that began at ``started`` (``time.perf_counter()``)"""
+        self._local.generated = False
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                if self.cold_start is None:
+                    self.cold_start = elapsed
+                    logger.info("First script run took %.0f ms", elapsed * 1000)
+                elif self._local.generated:
+                    self.generations += 1
+                else:
+                    self._reruns.append(elapsed)
+
+    def mark_generation(self) -> None:
+        """Exclude the current rerun from interaction overhead; it ran a generation"""
+        self._local.generated = True
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            reruns = list(self._reruns)
+            return {
+                "cold_start_ms": round((self.cold_start or 0) * 1000, 1),
+                "imports_ms": {name: round(seconds * 1000, 1) for name, seconds in self.imports.items()},
+                "reruns": len(reruns),
+                "rerun_p50_ms": round(_percentile(reruns, 50) * 1000, 1),
+                "rerun_p95_ms": round(_percentile(reruns, 95) * 1000, 1),
+                "last_rerun_ms": round(reruns[-1] * 1000, 1) if reruns else None,
+                "generations": self.generations,
+            }
+
+
+profiler = Profiler()
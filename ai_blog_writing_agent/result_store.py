@@ -0,0 +1,61 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+
+def normalize_topic(topic: str) -> str:
+    """Case- and whitespace-insensitive form of a topic, used in cache keys."""
+    return " ".join(topic.lower().split()).strip(" .!?")
+
+
+class ResultStore:
+    """Persistent store of finished blog posts.
+
+    Posts are keyed on the normalized topic, the LLM model id and a hash of the
+    task prompts, so changing either the model or the prompts invalidates old
+    results. Entries expire after ``ttl`` seconds and the oldest are evicted
+    once more than ``max_entries`` are stored.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, topic TEXT, content TEXT, created_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created_at)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(topic: str, model: str, prompt_version: str) -> str:
+        raw = "\x1f".join((normalize_topic(topic), model, prompt_version))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return ``(content, created_at)`` for a live entry, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content, created_at FROM results WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl),
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, topic: str, content: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, topic, content, time.time())
+            )
+            self._db.execute("DELETE FROM results WHERE created_at <= ?", (time.time() - self.ttl,))
+            self._db.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
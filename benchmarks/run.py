@@ -0,0 +1,231 @@
+"""Offline end-to-end benchmark for the blog pipelines.
+
+Starts the local stand-ins from ``stand_ins.py``, points a pipeline at them and
+runs it ``--runs`` times with ``--concurrency`` runs in flight, then reports
+p50/p95/p99 end-to-end latency, throughput and a per-stage breakdown built from
+the pipeline's own traces.
+
+    python benchmarks/run.py --pipeline simple --runs 12 --concurrency 3
+    python benchmarks/run.py --pipeline mcp --baseline benchmarks/baseline.json
+    python benchmarks/run.py --pipeline mcp --baseline benchmarks/baseline.json --update-baseline
+
+With ``--baseline`` the run fails (exit code 1) when p95 latency grows or
+throughput drops by more than ``--tolerance`` relative to the stored numbers.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from stand_ins import FakeLLMServer, FakeSearchServer, FixtureSite
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIRS = {
+    "simple": os.path.join(ROOT, "ai_blog_writing_agent"),
+    "mcp": os.path.join(ROOT, "mcp_powered_ai_blog_writing_agent"),
+}
+MCP_SERVER_DIR = os.path.join(APP_DIRS["mcp"], "search_mcp")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mcp_server(search_url, cache_dir):
+    """Run the search MCP server locally over streamable HTTP, talking to the fake SerpAPI."""
+    port = free_port()
+    env = {**os.environ, "SERPAPI_ENDPOINT": f"{search_url}/search", "CACHE_DIR": cache_dir}
+    code = ("import sys; sys.path.insert(0, '1'); from model import server; "
+            f"server.run(transport='streamable-http', host='127.0.0.1', port={port})")
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=MCP_SERVER_DIR, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("MCP server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process, f"http://127.0.0.1:{port}/mcp"
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("MCP server did not start within 60s")
+
+
+def make_runner(pipeline, search_url):
+    """Import the pipeline's app module and return a ``run(topic, traces)`` callable."""
+    sys.path.insert(0, APP_DIRS[pipeline])
+    import app
+
+    if pipeline == "simple":
+        from crewai.tools import BaseTool
+        import requests
+
+        class OfflineSearchTool(BaseTool):
+            name: str = "Search the internet"
+            description: str = "Search the internet for a query and return the top results."
+
+            def _run(self, search_query: str) -> str:
+                response = requests.post(f"{search_url}/serper/search", json={"q": search_query}, timeout=30)
+                return json.dumps(response.json()["organic"])
+
+        search_tool = OfflineSearchTool()
+
+        def run(topic, traces):
+            agents = app.create_agents(app.create_llm(), app.create_llm(), search_tool)
+            app.run_blog_generation(topic, agents, traces=traces)
+        return run
+
+    pool = app.get_mcp_pool()
+
+    def run(topic, traces):
+        with pool.lease() as agents:
+            app.run_blog_generation(topic, agents, traces)
+    return run
+
+
+def stage_breakdown(traces):
+    durations = defaultdict(list)
+    tokens = defaultdict(int)
+    for trace in traces:
+        for span in trace.spans:
+            if span["duration_ms"] is None or span["kind"] == "crew":
+                continue
+            key = f"{span['kind']}:{span['name']}"
+            durations[key].append(span["duration_ms"])
+            tokens[key] += span["prompt_tokens"] + span["completion_tokens"]
+    return {
+        key: {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "tokens": tokens[key],
+        }
+        for key, values in sorted(durations.items())
+    }
+
+
+def compare(report, baseline, tolerance):
+    failures = []
+    if report["p95_s"] > baseline["p95_s"] * (1 + tolerance):
+        failures.append(f"p95 latency {report['p95_s']:.2f}s vs baseline {baseline['p95_s']:.2f}s")
+    if report["throughput_per_min"] < baseline["throughput_per_min"] * (1 - tolerance):
+        failures.append(
+            f"throughput {report['throughput_per_min']:.2f}/min vs baseline {baseline['throughput_per_min']:.2f}/min"
+        )
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pipeline", choices=sorted(APP_DIRS), default="simple")
+    parser.add_argument("--runs", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--llm-ttft", type=float, default=0.3, help="Fake LLM time to first token (s)")
+    parser.add_argument("--llm-tps", type=float, default=80.0, help="Fake LLM tokens per second")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="Fake search latency (s)")
+    parser.add_argument("--site-latency", type=float, default=0.05, help="Fixture site latency (s)")
+    parser.add_argument("--baseline", help="JSON file with baseline numbers per pipeline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--out", help="Write the full report as JSON to this file")
+    args = parser.parse_args(argv)
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    work_dir = tempfile.mkdtemp(prefix="blog-bench-")
+    site = FixtureSite(latency=args.site_latency)
+    search = FakeSearchServer(site.url, latency=args.search_latency)
+    llm = FakeLLMServer(first_token_latency=args.llm_ttft, tokens_per_second=args.llm_tps)
+    os.environ.update({
+        "CLARIFAI_PAT": "benchmark", "SERPER_API_KEY": "benchmark", "CLARIFAI_BASE_URL": llm.url,
+        "BLOG_METRICS_PORT": "0", "BLOG_TRACE_LOG_PATH": os.path.join(work_dir, "traces.jsonl"),
+        "BLOG_RESULT_CACHE_PATH": os.path.join(work_dir, "results.sqlite"), "BLOG_LLM_CACHE": "0",
+    })
+
+    mcp_server = None
+    if args.pipeline == "mcp":
+        mcp_server, os.environ["MCP_SERVER_URL"] = start_mcp_server(search.url, os.path.join(work_dir, "mcp"))
+
+    try:
+        run = make_runner(args.pipeline, search.url)
+        traces, latencies, errors = [], [], []
+
+        def timed(i):
+            started = time.monotonic()
+            try:
+                run(f"Benchmark topic {i}", traces)
+            except Exception as e:
+                errors.append(str(e))
+                return
+            latencies.append(time.monotonic() - started)
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(timed, range(args.runs)))
+        wall = time.monotonic() - started
+    finally:
+        if mcp_server is not None:
+            mcp_server.terminate()
+        for server in (llm, search, site):
+            server.close()
+
+    report = {
+        "pipeline": args.pipeline, "runs": args.runs, "concurrency": args.concurrency, "errors": len(errors),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "throughput_per_min": round(len(latencies) / wall * 60, 2),
+        "upstream_requests": {"llm": llm.requests, "search": search.requests, "site": site.requests},
+        "stages": stage_breakdown(traces),
+    }
+
+    print(f"\n{args.pipeline}: {len(latencies)}/{args.runs} runs ok at concurrency {args.concurrency}")
+    print(f"  latency p50 {report['p50_s']:.2f}s  p95 {report['p95_s']:.2f}s  p99 {report['p99_s']:.2f}s")
+    print(f"  throughput {report['throughput_per_min']:.2f} runs/min  upstream {report['upstream_requests']}")
+    for stage, stats in report["stages"].items():
+        print(f"  {stage:<45} n={stats['count']:<4} mean {stats['mean_ms']:>9.1f}ms  "
+              f"p95 {stats['p95_ms']:>9.1f}ms  tokens {stats['tokens']}")
+    for error in errors[:5]:
+        print(f"  error: {error}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    status = 1 if errors else 0
+    if args.baseline:
+        baselines = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baselines = json.load(f)
+        if args.update_baseline:
+            baselines[args.pipeline] = {k: report[k] for k in ("p50_s", "p95_s", "p99_s", "throughput_per_min")}
+            with open(args.baseline, "w", encoding="utf-8") as f:
+                json.dump(baselines, f, indent=2)
+            print(f"  baseline updated in {args.baseline}")
+        elif args.pipeline in baselines:
+            failures = compare(report, baselines[args.pipeline], args.tolerance)
+            for failure in failures:
+                print(f"  REGRESSION: {failure}")
+            status = status or (1 if failures else 0)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
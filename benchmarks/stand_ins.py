@@ -0,0 +1,213 @@
+"""Local stand-ins for the remote services used by the blog pipelines.
+
+* ``FakeLLMServer`` - OpenAI-compatible ``/chat/completions`` (plain and SSE
+  streaming) with a configurable time-to-first-token and tokens per second.
+  It answers in crewai's ReAct format: one tool call per task when tools are
+  offered, then a markdown ``Final Answer``.
+* ``FakeSearchServer`` - SerpAPI ``/search`` (google, google_autocomplete and
+  google_trends engines) plus a Serper-style ``POST /serper/search``, with
+  organic results pointing at the fixture site.
+* ``FixtureSite`` - static HTML articles served at ``/articles/<n>``.
+
+All three are plain ``http.server`` servers started on a free localhost port.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+LOREM = (
+    "agents research retrieval latency throughput model inference pipeline context token cache "
+    "search ranking article content extraction keyword editor writer planner benchmark quality"
+).split()
+
+
+def _words(n: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(LOREM) for _ in range(n))
+
+
+class _Server:
+    """Runs a handler class on 127.0.0.1 in a daemon thread."""
+
+    def __init__(self, handler: type):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stand_in = self
+        self.port = self.httpd.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.requests = 0
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def stand_in(self):
+        return self.server.stand_in
+
+    def send_body(self, body: bytes, content_type: str, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, payload: Any, status: int = 200) -> None:
+        self.send_body(json.dumps(payload).encode("utf-8"), "application/json", status)
+
+    def read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class _LLMHandler(_Handler):
+    def do_POST(self):
+        llm = self.stand_in
+        llm.requests += 1
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json({"error": {"message": "not found"}}, 404)
+            return
+
+        request = self.read_json()
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        text = llm.reply(prompt)
+        prompt_tokens = len(prompt) // 4
+        tokens = re.findall(r"\S+\s*", text)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        model = request.get("model", "fake")
+
+        time.sleep(llm.first_token_latency)
+        if not request.get("stream"):
+            time.sleep(len(tokens) / llm.tokens_per_second)
+            self.send_json({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload: Optional[Dict[str, Any]]) -> None:
+            data = b"data: " + (json.dumps(payload).encode("utf-8") if payload else b"[DONE]") + b"\n\n"
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        for token in tokens:
+            time.sleep(1.0 / llm.tokens_per_second)
+            send_event({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "model": model,
+                        "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+        send_event({"id": "chatcmpl-fake", "object": "chat.completion.chunk", "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+        send_event(None)
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeLLMServer(_Server):
+    """OpenAI-compatible chat completions endpoint; point ``LLM(base_url=...)`` at ``self.url``."""
+
+    def __init__(self, first_token_latency: float = 0.3, tokens_per_second: float = 80.0, answer_tokens: int = 400):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+        super().__init__(_LLMHandler)
+
+    def reply(self, prompt: str) -> str:
+        tool = re.search(r"Tool Name: ([^\n]+)", prompt)
+        if tool and "Observation:" not in prompt:
+            argument = re.search(r"Tool Arguments: \{['\"](\w+)['\"]", prompt)
+            action_input = json.dumps({argument.group(1) if argument else "query": "benchmark topic"})
+            return (f"Thought: I should gather information first.\nAction: {tool.group(1).strip()}\n"
+                    f"Action Input: {action_input}")
+        body = "\n\n".join(f"## Section {i + 1}\n\n{_words(self.answer_tokens // 5, seed=i)}" for i in range(5))
+        return f"Thought: I now know the final answer\nFinal Answer: # Benchmark Post\n\n{body}"
+
+
+class _SearchHandler(_Handler):
+    def do_GET(self):
+        search = self.stand_in
+        search.requests += 1
+        time.sleep(search.latency)
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        engine = params.get("engine", "google")
+        query = params.get("q", "")
+        if engine == "google_autocomplete":
+            self.send_json({"suggestions": [{"value": f"{query} {word}"} for word in LOREM[:8]]})
+        elif engine == "google_trends":
+            keywords = [k.strip() for k in query.split(",")]
+            rng = random.Random(query)
+            self.send_json({"interest_over_time": {"timeline_data": [
+                {"values": [{"query": k, "extracted_value": rng.randint(0, 100)} for k in keywords]}
+                for _ in range(52)
+            ]}})
+        else:
+            self.send_json({"organic_results": search.organic(query)})
+
+    def do_POST(self):
+        search = self.stand_in
+        search.requests += 1
+        time.sleep(search.latency)
+        query = self.read_json().get("q", "")
+        self.send_json({"organic": [
+            {"title": r["title"], "link": r["link"], "snippet": r["snippet"]} for r in search.organic(query)
+        ]})
+
+
+class FakeSearchServer(_Server):
+    """SerpAPI- and Serper-compatible search endpoint returning links into a ``FixtureSite``."""
+
+    def __init__(self, site_url: str, latency: float = 0.2, results: int = 8):
+        self.site_url = site_url
+        self.latency = latency
+        self.results = results
+        super().__init__(_SearchHandler)
+
+    def organic(self, query: str):
+        offset = sum(map(ord, query)) % 50
+        return [
+            {"position": i + 1, "title": f"Article {offset + i} about {query}",
+             "link": f"{self.site_url}/articles/{offset + i}", "snippet": _words(30, seed=offset + i)}
+            for i in range(self.results)
+        ]
+
+
+class _SiteHandler(_Handler):
+    def do_GET(self):
+        site = self.stand_in
+        site.requests += 1
+        match = re.fullmatch(r"/articles/(\d+)", urlsplit(self.path).path)
+        if not match:
+            self.send_body(b"not found", "text/plain", 404)
+            return
+        time.sleep(site.latency)
+        n = int(match.group(1))
+        paragraphs = "".join(f"<p>{_words(80, seed=n * 100 + i)}.</p>" for i in range(site.paragraphs))
+        html = (f"<html><head><title>Article {n}</title></head><body><article><h1>Article {n}</h1>"
+                f"{paragraphs}</article></body></html>")
+        self.send_body(html.encode("utf-8"), "text/html; charset=utf-8")
+
+
+class FixtureSite(_Server):
+    """Static article pages for extraction benchmarks."""
+
+    def __init__(self, latency: float = 0.05, paragraphs: int = 20):
+        self.latency = latency
+        self.paragraphs = paragraphs
+        super().__init__(_SiteHandler)
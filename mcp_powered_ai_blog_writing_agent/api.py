@@ -0,0 +1,137 @@
+"""HTTP API for the plan → write → edit pipeline.
+
+Posts are generated on a bounded pool of worker threads behind a bounded
+queue; the asyncio front end only admits, polls and answers. A request is
+refused with ``429`` and a ``Retry-After`` header when the queue is full or
+when the work already admitted would not fit into the LLM endpoint's
+requests-per-minute and tokens-per-minute quotas within ``BLOG_API_MAX_QUEUE_WAIT``.
+
+    uvicorn api:api --host 0.0.0.0 --port 8000
+
+    POST /v1/posts {"topic": "...", "fanout": false, "wait": 0}   → 202 (or 200 with the post when done within `wait` s)
+    GET  /v1/posts/{id}                                           → job status, and the post once done
+    GET  /healthz                                                 → queue, quota and MCP connection state
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import app  # noqa: E402  (quiet Streamlit's "no script run context" warnings first)
+from jobs import JobQueue, QueueFull  # noqa: E402
+from mcp_pool import MCPAgentPool  # noqa: E402
+from quota import LLMQuota  # noqa: E402
+
+if app.missing_environment():
+    raise SystemExit("Please set the " + ", ".join(app.missing_environment()) + " environment variable(s)")
+
+API_WORKERS = int(os.getenv("BLOG_API_WORKERS", "4"))
+API_QUEUE_SIZE = int(os.getenv("BLOG_API_QUEUE_SIZE", "16"))
+API_MAX_QUEUE_WAIT = float(os.getenv("BLOG_API_MAX_QUEUE_WAIT", "120"))  # seconds of quota backlog accepted
+
+# Quotas of the Clarifai OpenAI-compatible endpoint, and what one post is expected to spend of them
+LLM_RPM = float(os.getenv("CLARIFAI_RPM", "60"))
+LLM_TPM = float(os.getenv("CLARIFAI_TPM", "200000"))
+CALLS_PER_POST = float(os.getenv("BLOG_API_CALLS_PER_POST", "8"))
+TOKENS_PER_POST = float(os.getenv("BLOG_API_TOKENS_PER_POST", "30000"))
+
+quota = LLMQuota(LLM_RPM, LLM_TPM)
+quota.wrap(app.clarifai_llm)  # shared by the planner, writers and section writers
+
+
+def build_limited_agents(mcp_tools):
+    agents = app.build_agents(mcp_tools)
+    quota.wrap(agents["editor"].llm)  # each agent set has its own streaming editor client
+    return agents
+
+
+mcp_pool = MCPAgentPool(app.server_params, build_limited_agents, refresh_interval=app.MCP_REFRESH_INTERVAL)
+
+
+def run_job(job):
+    with mcp_pool.lease() as agents:
+        return app.run_blog_generation(
+            job.topic, agents, job.traces, fanout=job.options["fanout"], fresh=job.options["fresh"]
+        )
+
+
+jobs = JobQueue(run_job, workers=API_WORKERS, max_queued=API_QUEUE_SIZE)
+api = FastAPI(title="AI Blog Writing Agent API")
+
+
+class PostRequest(BaseModel):
+    topic: str = Field(min_length=1, description="Blog topic")
+    fanout: bool = Field(False, description="Write the outline's sections in parallel")
+    fresh: bool = Field(False, description="Call the model for every step instead of replaying cached completions")
+    wait: float = Field(0, ge=0, le=600, description="Seconds to wait for the post before answering 202")
+
+
+def job_body(job):
+    body = {
+        "id": job.id, "topic": job.topic, "status": job.status,
+        "created": job.created, "started": job.started, "finished": job.finished,
+    }
+    if job.status == "queued":
+        body["queue_position"] = jobs.position(job)
+    if job.status == "done":
+        body["post"] = job.result
+    if job.status == "failed":
+        body["error"] = job.error
+    return body
+
+
+def too_many_requests(detail, retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    return JSONResponse(
+        {"detail": detail, "retry_after": seconds}, status_code=429, headers={"Retry-After": str(seconds)}
+    )
+
+
+@api.post("/v1/posts")
+async def create_post(request: PostRequest):
+    stats = jobs.stats()
+    outstanding = stats["queued"] + stats["running"]
+    wait = quota.retry_after(outstanding + 1, CALLS_PER_POST, TOKENS_PER_POST, API_MAX_QUEUE_WAIT)
+    if wait > 0:
+        return too_many_requests("LLM quota is committed to posts already in progress", wait)
+    try:
+        job = jobs.submit(request.topic.strip(), fanout=request.fanout, fresh=request.fresh)
+    except QueueFull as e:
+        return too_many_requests(str(e), jobs.estimated_wait())
+
+    deadline = time.monotonic() + request.wait
+    while not job.done and time.monotonic() < deadline:
+        await asyncio.sleep(0.25)
+    status_code = 200 if job.done else 202
+    return JSONResponse(job_body(job), status_code=status_code, headers={"Location": f"/v1/posts/{job.id}"})
+
+
+@api.get("/v1/posts/{job_id}")
+async def get_post(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job_body(job)
+
+
+@api.get("/healthz")
+async def health():
+    return {
+        "jobs": jobs.stats(),
+        "quota": quota.stats(),
+        "llm_cache": app.get_llm_cache().stats() if app.LLM_CACHE_ENABLED else None,
+        "mcp": {"healthy": mcp_pool.healthy, "last_error": mcp_pool.last_error, "tools": mcp_pool.tool_names},
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(api, host=os.getenv("BLOG_API_HOST", "0.0.0.0"), port=int(os.getenv("BLOG_API_PORT", "8000")))
@@ -1,26 +1,54 @@
 import streamlit as st
 import os
+import logging
+import time
+from contextlib import nullcontext
 from crewai import Agent, Task, Crew, Process, LLM
-from crewai_tools import MCPServerAdapter
+from fanout import OUTLINE_FORMAT, create_section_tasks, split_outline
+from jobs import JobQueue, QueueFull
+from llm_cache import CompletionCache
+from mcp_pool import MCPAgentPool
+from streaming import render_crew_stream
+from tracing import Tracer, render_waterfall
 
 # Environment variables
 CLARIFAI_PAT = os.getenv("CLARIFAI_PAT")
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 
-if not CLARIFAI_PAT:
-    st.error("Please set CLARIFAI_PAT environment variable")
-    st.stop()
-
-if not SERPER_API_KEY:
-    st.error("Please set SERPER_API_KEY environment variable")
-    st.stop()
+def missing_environment():
+    """Names of required environment variables that are not set"""
+    return [name for name, value in (("CLARIFAI_PAT", CLARIFAI_PAT), ("SERPER_API_KEY", SERPER_API_KEY)) if not value]
 
 # Configure Clarifai LLM
-clarifai_llm = LLM(
+LLM_BASE_URL = os.getenv("CLARIFAI_BASE_URL", "https://api.clarifai.com/v2/ext/openai/v1")
+
+# Prompt-level completion cache in front of every LLM client. Deterministic mode pins
+# temperature and seed so that a replayed run reproduces the original exactly.
+LLM_CACHE_ENABLED = os.getenv("BLOG_LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv(
+    "BLOG_LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm.sqlite")
+)
+LLM_CACHE_MAX_BYTES = int(os.getenv("BLOG_LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_DETERMINISTIC = os.getenv("BLOG_LLM_DETERMINISTIC", "0") == "1"
+LLM_SAMPLING = {"temperature": 0, "seed": int(os.getenv("BLOG_LLM_SEED", "0"))} if LLM_DETERMINISTIC else {}
+
+
+@st.cache_resource
+def get_llm_cache():
+    return CompletionCache(LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES)
+
+
+def cached(llm, agent):
+    """Put the completion cache in front of ``llm``; ``agent`` labels its calls in the cache statistics"""
+    return get_llm_cache().wrap(llm, agent) if LLM_CACHE_ENABLED else llm
+
+
+clarifai_llm = cached(LLM(
     model="openai/openai/chat-completion/models/gpt-4o",
     api_key=CLARIFAI_PAT,
-    base_url="https://api.clarifai.com/v2/ext/openai/v1"
-)
+    base_url=LLM_BASE_URL,
+    **LLM_SAMPLING
+), "planner")
 
 # MCP Server Configuration
 USER_ID = "sumanth"
@@ -28,92 +56,120 @@ APP_ID = "mcp-examples"
 MODEL_ID = "blog_writing_search_mcp"
 
 server_params = {
-    "url": f"https://api.clarifai.com/v2/ext/mcp/v1/users/{USER_ID}/apps/{APP_ID}/models/{MODEL_ID}",
-    "headers": {"Authorization": "Bearer " + CLARIFAI_PAT},
+    "url": os.getenv(
+        "MCP_SERVER_URL", f"https://api.clarifai.com/v2/ext/mcp/v1/users/{USER_ID}/apps/{APP_ID}/models/{MODEL_ID}"
+    ),
+    "headers": {"Authorization": f"Bearer {CLARIFAI_PAT or ''}"},
     "transport": "streamable-http"
 }
 
-# Streamlit App
-def main():
-    st.set_page_config(page_title="AI Blog Writing Agent", page_icon="📝", layout="wide")
-    st.title("📝 AI Blog Writing Agent")
-    st.markdown("<h2 style='text-align: center; color: #2E86C1;'><strong>Powered by Clarifai, CrewAI & a Custom SerpAPI MCP Server</strong></h2>", unsafe_allow_html=True)
+MCP_REFRESH_INTERVAL = 300  # seconds between background health checks / tool-list refreshes
 
-    st.markdown("""
-    **How it works:**
-    - ✅ **Planner Agent**: Researches top articles and extracts SEO keywords.
-    - ✍️ **Writer Agent**: Writes a full blog post using the research and outline.
-    - 🔎 **Editor Agent**: Polishes the final post and formats it in markdown.
-    """)
+# Per-stage tracing: spans are appended to a JSON lines file and summed into Prometheus metrics
+TRACE_LOG_PATH = os.getenv(
+    "BLOG_TRACE_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "traces.jsonl")
+)
+METRICS_PORT = int(os.getenv("BLOG_METRICS_PORT", "9464"))  # 0 disables the /metrics endpoint
+
+# Fan-out mode writes the outline's sections concurrently, then the editor stitches them together
+FANOUT_MAX_SECTIONS = int(os.getenv("BLOG_FANOUT_MAX_SECTIONS", "6"))
+
+# Background generation: bounded workers shared by all sessions, with a bounded queue in front of them
+JOB_WORKERS = int(os.getenv("BLOG_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("BLOG_JOB_QUEUE_SIZE", "8"))
+JOB_POLL_INTERVAL = 2  # seconds between status checks while a job is pending
+
+
+def build_agents(mcp_tools):
+    """Create the planner, writer and editor agents on top of the MCP tools"""
+    planner = Agent(
+        role="SEO Researcher and Content Planner",
+        goal="Extract key insights, find SEO keywords, and outline the blog.",
+        backstory="You research top articles and produce outlines optimized for engagement and SEO.",
+        tools=mcp_tools,
+        verbose=True,
+        llm=clarifai_llm,
+        allow_delegation=False
+    )
 
-    topic = st.text_input(
-        "Enter your blog topic:",
-        placeholder="e.g., The Future of Quantum Computing",
-        help="Be specific for better results"
+    writer = Agent(
+        role="Blog Post Writer",
+        goal="Create a detailed, high-quality blog post using the research and outline.",
+        backstory="You are a writer who specializes in transforming outlines into compelling blog posts.",
+        verbose=True,
+        llm=clarifai_llm,
+        allow_delegation=False
     )
 
-    generate_button = st.button("🚀 Generate Blog", type="primary")
+    # Each agent set gets its own streaming client for the final stage, so the
+    # token events of one run can be told apart from those of a concurrent run.
+    editor_llm = cached(LLM(
+        model="openai/openai/chat-completion/models/gpt-4o",
+        api_key=CLARIFAI_PAT,
+        base_url=LLM_BASE_URL,
+        stream=True,
+        **LLM_SAMPLING
+    ), "editor")
+
+    editor = Agent(
+        role="Blog Editor and Formatter",
+        goal="Edit the blog post, correct grammar, and format it in markdown.",
+        backstory="You ensure every blog is well-written, polished, and correctly formatted for publishing.",
+        verbose=True,
+        llm=editor_llm,
+        allow_delegation=False
+    )
 
-    if generate_button:
-        if not topic.strip():
-            st.error("Please enter a topic for the blog post.")
-        else:
-            with st.spinner(f"Running agents on: '{topic}'..."):
-                try:
-                    with MCPServerAdapter(server_params) as mcp_tools:
-                        st.info(f"✅ Connected to MCP Server. Tools: {[tool.name for tool in mcp_tools]}")
-
-                        # Agents
-                        planner = Agent(
-                            role="SEO Researcher and Content Planner",
-                            goal="Extract key insights, find SEO keywords, and outline the blog.",
-                            backstory="You research top articles and produce outlines optimized for engagement and SEO.",
-                            tools=mcp_tools,
-                            verbose=True,
-                            llm=clarifai_llm,
-                            allow_delegation=False
-                        )
-
-                        writer = Agent(
-                            role="Blog Post Writer",
-                            goal="Create a detailed, high-quality blog post using the research and outline.",
-                            backstory="You are a writer who specializes in transforming outlines into compelling blog posts.",
-                            verbose=True,
-                            llm=clarifai_llm,
-                            allow_delegation=False
-                        )
-
-                        editor = Agent(
-                            role="Blog Editor and Formatter",
-                            goal="Edit the blog post, correct grammar, and format it in markdown.",
-                            backstory="You ensure every blog is well-written, polished, and correctly formatted for publishing.",
-                            verbose=True,
-                            llm=clarifai_llm,
-                            allow_delegation=False
-                        )
-
-                        # Tasks
-                        plan_task = Task(
-                            description=f"""
+    return {"planner": planner, "writer": writer, "editor": editor}
+
+
+def create_section_writer():
+    """A writer for one section in fan-out mode; every section gets its own agent"""
+    return Agent(
+        role="Blog Section Writer",
+        goal="Write one section of a blog post from its outline points and the research.",
+        backstory="You are a writer who turns a single outline section into focused, engaging prose.",
+        verbose=True,
+        llm=clarifai_llm,
+        allow_delegation=False
+    )
+
+
+@st.cache_resource
+def get_mcp_pool():
+    """One MCP connection and agent pool per server process, shared by all browser sessions"""
+    return MCPAgentPool(server_params, build_agents, refresh_interval=MCP_REFRESH_INTERVAL)
+
+
+def create_plan_task(topic, agents, fanout=False):
+    """Create the research and outline task; in fan-out mode the outline marks its sections"""
+    return Task(
+        description=f"""
 For the topic "{topic}":
 
-1. Use `multi_engine_search` to find 5 recent, relevant articles.
-2. Extract content using `extract_web_content_from_links`.
-3. Use `keyword_research` to find SEO keywords.
-4. Summarize key findings and generate a structured outline.
+1. Call `research_topic` once to search for 5 recent, relevant articles, extract their content
+   and find SEO keywords in a single step.
+2. Only if it returns too little usable content, fall back to `multi_engine_search`,
+   `extract_web_content_from_links` and `keyword_research`.
+3. Summarize key findings and generate a structured outline.
 
 The outline should include:
 - Title
 - Introduction
 - 3-4 section headings with bullet points
 - Conclusion
-""",
-                            expected_output="A blog outline with insights, 5-10 SEO keywords, and detailed structure.",
-                            agent=planner
-                        )
+""" + (OUTLINE_FORMAT if fanout else ""),
+        expected_output="A blog outline with insights, 5-10 SEO keywords, and detailed structure.",
+        agent=agents["planner"]
+    )
+
 
-                        write_task = Task(
-                            description=f"""
+def create_tasks(topic, agents):
+    """Create the plan, write and edit tasks for the given topic"""
+    plan_task = create_plan_task(topic, agents)
+
+    write_task = Task(
+        description=f"""
 Using the outline and research for "{topic}", write a complete blog post with:
 
 - At least 5–6 paragraphs
@@ -123,13 +179,13 @@ Using the outline and research for "{topic}", write a complete blog post with:
 
 Use examples and factual support where possible.
 """,
-                            expected_output="Full markdown blog post draft, ready for editing.",
-                            agent=writer,
-                            context=[plan_task]
-                        )
+        expected_output="Full markdown blog post draft, ready for editing.",
+        agent=agents["writer"],
+        context=[plan_task]
+    )
 
-                        edit_task = Task(
-                            description=f"""
+    edit_task = Task(
+        description=f"""
 Edit the blog post for "{topic}":
 
 - Fix grammar and clarity issues
@@ -143,40 +199,276 @@ Edit the blog post for "{topic}":
 
 Return the final polished markdown content.
 """,
-                            expected_output="Final markdown blog post, ready for publishing.",
-                            agent=editor,
-                            context=[write_task]
-                        )
-
-                        # Run the Crew
-                        crew = Crew(
-                            agents=[planner, writer, editor],
-                            tasks=[plan_task, write_task, edit_task],
-                            process=Process.sequential,
-                            verbose=1
-                        )
-                        result = crew.kickoff()
-
-                        final_output = result.output if hasattr(result, "output") else str(result)
-
-                        st.success("✅ Blog post generated successfully!")
-                        st.markdown("---")
-                        st.markdown(final_output, unsafe_allow_html=False)
-
-                        st.download_button(
-                            label="📥 Download as Markdown",
-                            data=final_output,
-                            file_name=f"{topic.replace(' ', '_').lower()}_blog.md",
-                            mime="text/markdown"
-                        )
+        expected_output="Final markdown blog post, ready for publishing.",
+        agent=agents["editor"],
+        context=[write_task]
+    )
+
+    return plan_task, write_task, edit_task
+
+
+def create_crew(topic, agents):
+    """Create the plan → write → edit crew for the given topic"""
+    plan_task, write_task, edit_task = create_tasks(topic, agents)
+
+    return Crew(
+        agents=[agents["planner"], agents["writer"], agents["editor"]],
+        tasks=[plan_task, write_task, edit_task],
+        process=Process.sequential,
+        verbose=1
+    )
+
+
+def create_plan_crew(topic, agents):
+    """Create the planning-only crew that precedes the fan-out crew"""
+    plan_task = create_plan_task(topic, agents, fanout=True)
+    return Crew(agents=[agents["planner"]], tasks=[plan_task], process=Process.sequential, verbose=1)
+
+
+def create_fanout_crew(topic, agents, plan_task):
+    """Create the crew that writes each outline section concurrently and then stitches and edits the post
+
+    Returns the crew and the ``(heading, points)`` sections it writes.
+    """
+    sections = split_outline(plan_task.output.raw, FANOUT_MAX_SECTIONS)
+    section_tasks = create_section_tasks(topic, sections, create_section_writer, context=[plan_task])
+
+    stitch_task = Task(
+        description=f"""
+The sections of the blog post for "{topic}" were written separately and are given in order.
+Join them into one post and edit it:
+
+- Keep the section order and their content; add a `#` title and a short bridge where sections meet
+- Remove repetition between sections and make terminology consistent
+- Fix grammar and clarity issues
+- Ensure the SEO keywords from the plan are present naturally
+- Format properly in markdown:
+    - Use `#` for title
+    - `##` for section headers
+    - Paragraph spacing and bullet points
+    - Bold key phrases if needed
+
+Return the final polished markdown content.
+""",
+        expected_output="Final markdown blog post, ready for publishing.",
+        agent=agents["editor"],
+        context=[plan_task, *section_tasks]
+    )
+
+    crew = Crew(
+        agents=[task.agent for task in section_tasks] + [agents["editor"]],
+        tasks=[*section_tasks, stitch_task],
+        process=Process.sequential,
+        verbose=1
+    )
+    return crew, sections
+
+
+def final_output_of(result):
+    return result.output if hasattr(result, "output") else str(result)
+
+
+@st.cache_resource
+def get_tracer():
+    tracer = Tracer(TRACE_LOG_PATH)
+    if METRICS_PORT:
+        try:
+            tracer.serve_metrics(METRICS_PORT)
+        except OSError as e:
+            logging.warning("Metrics endpoint not started on port %s: %s", METRICS_PORT, e)
+    return tracer
+
+
+def traced_kickoff(crew, topic, traces=None, fresh=False):
+    """``crew.kickoff()`` recorded as a traced run, appended to ``traces`` when a list is given
+
+    With ``fresh`` every LLM call goes to the model instead of the completion cache.
+    """
+    bypass = get_llm_cache().bypass(crew) if fresh and LLM_CACHE_ENABLED else nullcontext()
+    with get_tracer().trace_run(crew, topic) as trace, bypass:
+        if traces is not None:
+            traces.append(trace)
+        return crew.kickoff()
+
+
+def run_blog_generation(topic, agents, traces=None, fanout=False, fresh=False):
+    """Run the plan → write → edit crew for the given topic
+
+    With ``fanout`` the plan runs first, then its outline sections are written
+    concurrently and the editor stitches them into the final post. With
+    ``fresh`` no completion is replayed from the LLM cache.
+    """
+    if fanout:
+        plan_crew = create_plan_crew(topic, agents)
+        traced_kickoff(plan_crew, topic, traces, fresh)
+        crew, _ = create_fanout_crew(topic, agents, plan_crew.tasks[0])
+    else:
+        crew = create_crew(topic, agents)
+    result = traced_kickoff(crew, topic, traces, fresh)
+    return final_output_of(result)
+
+
+def stream_blog_generation(topic, agents, traces=None, fanout=False, fresh=False):
+    """Run the crew with live stage progress and the edited post streamed in as it is written"""
+    if fanout:
+        plan_crew = create_plan_crew(topic, agents)
+        render_crew_stream(
+            plan_crew, ["✅ Planning & research"], kickoff=lambda: traced_kickoff(plan_crew, topic, traces, fresh)
+        )
+        crew, sections = create_fanout_crew(topic, agents, plan_crew.tasks[0])
+        labels = [f"✍️ Writing: {heading}" for heading, _ in sections] + ["🔎 Stitching & editing"]
+    else:
+        crew = create_crew(topic, agents)
+        labels = ["✅ Planning & research", "✍️ Writing", "🔎 Editing"]
+    result = render_crew_stream(
+        crew, labels, stream_llm=agents["editor"].llm, kickoff=lambda: traced_kickoff(crew, topic, traces, fresh)
+    )
+    return final_output_of(result)
+
+
+def run_job(job):
+    """Generate the post for a background job with agents leased from the MCP pool"""
+    with get_mcp_pool().lease() as agents:
+        return run_blog_generation(
+            job.topic, agents, job.traces, fanout=job.options["fanout"], fresh=job.options["fresh"]
+        )
+
+
+@st.cache_resource
+def get_job_queue():
+    return JobQueue(run_job, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE)
+
+
+def show_post(topic, final_output):
+    st.success("✅ Blog post generated successfully!")
+    st.markdown("---")
+    st.markdown(final_output, unsafe_allow_html=False)
+
+    st.download_button(
+        label="📥 Download as Markdown",
+        data=final_output,
+        file_name=f"{topic.replace(' ', '_').lower()}_blog.md",
+        mime="text/markdown"
+    )
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def poll_job(job):
+    """Show a pending job's progress, rerunning the page once it finishes"""
+    if job.done:
+        st.rerun()
+    if job.status == "queued":
+        st.info(f"⏳ Queued behind {get_job_queue().position(job)} other post(s).")
+    else:
+        st.info(f"Running agents on: '{job.topic}' ({time.time() - job.started:.0f}s)...")
+        for trace in job.traces:
+            for span in [span for span in trace.spans if span["kind"] == "task"]:
+                st.write(f"{'✅' if span['end'] else '▶️'} {span['name']}")
+    st.caption(f"Job `{job.id}`: you can leave this page and open this URL again later to get the post.")
+
+
+def show_job(job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.warning(f"Job `{job_id}` was not found. Finished posts are kept for an hour.")
+    elif not job.done:
+        poll_job(job)
+    else:
+        if job.traces:
+            st.session_state["last_trace"] = job.traces[-1]
+        if job.status == "failed":
+            st.error(f"An error occurred: {job.error}")
+        else:
+            show_post(job.topic, job.result)
+
+
+# Streamlit App
+def main():
+    st.set_page_config(page_title="AI Blog Writing Agent", page_icon="📝", layout="wide")
+    for name in missing_environment():
+        st.error(f"Please set {name} environment variable")
+    if missing_environment():
+        st.stop()
+    st.title("📝 AI Blog Writing Agent")
+    st.markdown("<h2 style='text-align: center; color: #2E86C1;'><strong>Powered by Clarifai, CrewAI & a Custom SerpAPI MCP Server</strong></h2>", unsafe_allow_html=True)
+
+    st.markdown("""
+    **How it works:**
+    - ✅ **Planner Agent**: Researches top articles and extracts SEO keywords.
+    - ✍️ **Writer Agent**: Writes a full blog post using the research and outline.
+    - 🔎 **Editor Agent**: Polishes the final post and formats it in markdown.
+    """)
+
+    topic = st.text_input(
+        "Enter your blog topic:",
+        placeholder="e.g., The Future of Quantum Computing",
+        help="Be specific for better results"
+    )
+
+    generate_button = st.button("🚀 Generate Blog", type="primary")
+    background = st.toggle(
+        "Run in background", value=True,
+        help="Queue the post and fetch it from this page's URL later, even after leaving the page"
+    )
+    stream_output = st.toggle("Stream progress and output", value=True, disabled=background)
+    fanout = st.toggle(
+        "Write sections in parallel", value=False,
+        help="Write each outline section concurrently, then stitch and edit them into one post"
+    )
+    fresh = st.checkbox(
+        "♻️ Regenerate (ignore cached model replies)", value=False, disabled=not LLM_CACHE_ENABLED,
+        help="Send every call to the model instead of replaying identical calls from the LLM cache"
+    )
+
+    mcp_pool = get_mcp_pool()
+
+    if generate_button:
+        if not topic.strip():
+            st.error("Please enter a topic for the blog post.")
+        elif background:
+            try:
+                job = get_job_queue().submit(topic, fanout=fanout, fresh=fresh)
+            except QueueFull as e:
+                st.error(f"⏳ The server is busy, please try again shortly ({e}).")
+            else:
+                st.query_params["job"] = job.id
+        else:
+            with st.spinner(f"Running agents on: '{topic}'..."):
+                try:
+                    with mcp_pool.lease() as agents:
+                        st.info(f"✅ Connected to MCP Server. Tools: {mcp_pool.tool_names}")
+                        traces = []
+                        if stream_output:
+                            final_output = stream_blog_generation(topic, agents, traces, fanout=fanout, fresh=fresh)
+                        else:
+                            final_output = run_blog_generation(topic, agents, traces, fanout=fanout, fresh=fresh)
+                        if traces:
+                            st.session_state["last_trace"] = traces[-1]
+
+                    show_post(topic, final_output)
 
                 except Exception as e:
                     st.error(f"An error occurred: {e}")
 
+    # A background job started here or in an earlier visit to this URL
+    if "job" in st.query_params and (background or not generate_button):
+        show_job(st.query_params["job"])
+
     with st.sidebar:
+        if "last_trace" in st.session_state:
+            st.header("⏱️ Last Run")
+            render_waterfall(st.session_state["last_trace"])
+
+        if LLM_CACHE_ENABLED and get_llm_cache().stats():
+            st.header("🧠 LLM Cache")
+            for agent, counts in get_llm_cache().stats().items():
+                calls = counts["hits"] + counts["misses"]
+                st.markdown(f"- **{agent}:** {counts['hit_rate']:.0%} hits ({counts['hits']}/{calls} calls)")
+
         st.header("⚙️ Configuration")
         st.markdown("**MCP Server:**")
         st.code(f"USER_ID: {USER_ID}\nAPP_ID: {APP_ID}\nMODEL_ID: {MODEL_ID}", language="text")
+        st.markdown(f"- Connection: {'🟢 healthy' if mcp_pool.healthy else '🔴 ' + (mcp_pool.last_error or 'connecting…')}")
         st.markdown("**LLM Config:**")
         st.markdown("- Model: `gpt-4o` via Clarifai")
         st.markdown("- Base URL: `https://api.clarifai.com`")
@@ -185,6 +477,9 @@ Return the final polished markdown content.
         st.markdown("- Research via search + content extraction")
         st.markdown("- Keyword generation for SEO")
         st.markdown("- Plan → Write → Edit flow with agents")
+        st.markdown("- Optional parallel section writing")
+        st.markdown("- Live stage progress and streamed output")
+        st.markdown("- Background generation you can come back to")
 
         st.warning("⚠️ Keep your API keys secure. Ensure the MCP server is live on Clarifai.")
 
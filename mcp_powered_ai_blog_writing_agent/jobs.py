@@ -0,0 +1,131 @@
+# Copied, not imported: ai_blog_writing_agent/ and mcp_powered_ai_blog_writing_agent/ are
+# each run on their own from their directory, so both keep this module. Keep the copies identical.
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised by ``JobQueue.submit`` when every worker is busy and the queue is at capacity."""
+
+
+class Job:
+    """One queued generation; ``traces`` fills with the run's ``RunTrace`` objects while it executes."""
+
+    def __init__(self, topic: str, options: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.topic = topic
+        self.options = options
+        self.status = "queued"  # queued → running → done | failed
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.traces: List[Any] = []
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class JobQueue:
+    """Bounded background workers for blog generation, shared by every Streamlit session.
+
+    ``submit`` returns at once with a ``Job`` whose id can be polled with ``get``
+    from any session, so a user can leave the page and fetch the result later.
+    At most ``workers`` runs execute at a time and at most ``max_queued`` wait;
+    beyond that ``submit`` raises ``QueueFull`` instead of piling up work.
+    Finished jobs are kept for ``keep_seconds`` (and at most ``keep_jobs`` of them).
+
+    ``run(job)`` does the work and returns the post; it is called on a worker thread.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Job], Any],
+        workers: int = 2,
+        max_queued: int = 8,
+        keep_seconds: float = 3600.0,
+        keep_jobs: int = 200,
+    ):
+        self.run = run
+        self.workers = workers
+        self.keep_seconds = keep_seconds
+        self.keep_jobs = keep_jobs
+        self._pending: "queue.Queue[Job]" = queue.Queue(maxsize=max_queued)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"blog-job-{i}", daemon=True).start()
+
+    def submit(self, topic: str, **options: Any) -> Job:
+        job = Job(topic, options)
+        with self._lock:
+            self._prune()
+            try:
+                self._pending.put_nowait(job)
+            except queue.Full:
+                raise QueueFull(f"{self._pending.maxsize} jobs are already waiting; try again shortly") from None
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int:
+        """Number of jobs ahead of ``job`` in the queue (0 once it is running)"""
+        if job.status != "queued":
+            return 0
+        with self._lock:
+            queued = [j for j in self._jobs.values() if j.status == "queued"]
+        return next((i for i, j in enumerate(queued) if j is job), 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {**counts, "workers": self.workers, "capacity": self._pending.maxsize}
+
+    def estimated_wait(self, default_run_seconds: float = 60.0) -> float:
+        """Rough seconds until a job submitted now would start, from the mean duration of finished jobs"""
+        with self._lock:
+            runs = [job.finished - job.started for job in self._jobs.values() if job.status == "done"]
+            queued = sum(job.status == "queued" for job in self._jobs.values())
+        mean = sum(runs) / len(runs) if runs else default_run_seconds
+        return mean * (queued + 1) / self.workers
+
+    def _work(self) -> None:
+        while True:
+            job = self._pending.get()
+            # Status goes last, so a reader that sees "running" or done also sees the timestamps.
+            with self._lock:
+                job.started = time.time()
+                job.status = "running"
+            result, error = None, None
+            try:
+                result = str(self.run(job))
+            except Exception as e:
+                logger.exception("Job %s failed", job.id)
+                error = str(e) or type(e).__name__
+            with self._lock:
+                job.finished = time.time()
+                job.result, job.error = result, error
+                job.status = "failed" if error is not None else "done"
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.keep_seconds
+        finished = [job for job in self._jobs.values() if job.done]
+        excess = len(finished) - self.keep_jobs
+        for i, job in enumerate(finished):
+            if i < excess or job.finished < cutoff:
+                del self._jobs[job.id]
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from crewai_tools import MCPServerAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class _Generation:
+    """One open MCP connection plus the agents built on top of its tools."""
+
+    def __init__(self, server_params: Dict[str, Any]):
+        self.adapter = MCPServerAdapter(server_params)
+        self.tools = self.adapter.tools
+        self.tool_names: List[str] = [tool.name for tool in self.tools]
+        self.connected_at = time.time()
+        self.idle_agents: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+        self.in_use = 0
+        self.retired = False
+        self.listing: Optional[List[str]] = None
+
+    def probe(self, timeout: float) -> Optional[List[str]]:
+        """List the server's tools over the open session; raises if the connection is gone.
+
+        Returns None when the adapter does not expose its session (the
+        connection then is only replaced after a failed run).
+        """
+        core = getattr(self.adapter, "_adapter", None)  # mcpadapt.MCPAdapt: owns the sessions and their loop
+        if core is None or not hasattr(core, "sessions") or not hasattr(core, "loop"):
+            return None
+        names = []
+        for session in core.sessions:
+            listing = asyncio.run_coroutine_threadsafe(session.list_tools(), core.loop).result(timeout)
+            names += [tool.name for tool in listing.tools]
+        return names
+
+    def close(self) -> None:
+        try:
+            self.adapter.stop()
+        except Exception:
+            logger.warning("Error closing MCP connection", exc_info=True)
+
+
+class MCPAgentPool:
+    """Long-lived MCP connection and agent pool shared by all Streamlit sessions.
+
+    The connection (and its tool listing) is opened once and reused by every
+    run. Every ``refresh_interval`` seconds, and right after a run fails, a
+    background thread lists the server's tools over the open session; only
+    when that probe fails or the tool list has changed is the connection
+    replaced, together with the agents built on it. Agents are checked out one
+    set per run, so concurrent sessions never share an agent; a replaced
+    connection is closed once its last run returns its agents.
+    """
+
+    def __init__(
+        self,
+        server_params: Dict[str, Any],
+        build_agents: Callable[[Any], Dict[str, Any]],
+        refresh_interval: float = 300.0,
+        probe_timeout: float = 10.0,
+    ):
+        self.server_params = server_params
+        self.build_agents = build_agents
+        self.refresh_interval = refresh_interval
+        self.probe_timeout = probe_timeout
+        self.healthy = False
+        self.last_error: Optional[str] = None
+        self._current: Optional[_Generation] = None
+        self._lock = threading.Lock()
+        self._connect_lock = threading.Lock()  # serializes opening connections
+        self._wake = threading.Event()
+        self._wake.set()  # connect in the background right away
+        threading.Thread(target=self._refresh_loop, name="mcp-refresh", daemon=True).start()
+
+    @property
+    def tool_names(self) -> List[str]:
+        current = self._current
+        return current.tool_names if current else []
+
+    @contextmanager
+    def lease(self) -> Iterator[Dict[str, Any]]:
+        """Check out a set of agents bound to the live MCP connection."""
+        generation = self._acquire()
+        agents = None
+        try:
+            try:
+                agents = generation.idle_agents.get_nowait()
+            except queue.Empty:
+                agents = self.build_agents(generation.tools)
+            yield agents
+        except Exception:
+            # The run may have failed because the connection dropped; check it in the background.
+            self._wake.set()
+            raise
+        finally:
+            if agents is not None:
+                generation.idle_agents.put(agents)
+            self._release(generation)
+
+    def _acquire(self) -> _Generation:
+        if self._current is None:
+            self._connect(replacing=None)
+        with self._lock:
+            self._current.in_use += 1
+            return self._current
+
+    def _release(self, generation: _Generation) -> None:
+        with self._lock:
+            generation.in_use -= 1
+            close = generation.retired and generation.in_use == 0
+        if close:
+            generation.close()
+
+    def _connect(self, replacing: Optional[_Generation]) -> None:
+        """Open a new connection unless someone already replaced ``replacing`` while we waited."""
+        with self._connect_lock:
+            if self._current is not replacing:
+                return
+            try:
+                generation = _Generation(self.server_params)
+            except Exception as e:
+                self.healthy, self.last_error = False, str(e)
+                raise
+            try:
+                generation.listing = generation.probe(self.probe_timeout)  # baseline for spotting tool-list changes
+            except Exception:
+                logger.warning("Could not list MCP tools right after connecting", exc_info=True)
+            with self._lock:
+                self._swap(generation)
+
+    def _swap(self, generation: _Generation) -> None:
+        # Caller holds self._lock.
+        old, self._current = self._current, generation
+        self.healthy, self.last_error = True, None
+        if old is not None:
+            old.retired = True
+            if old.in_use == 0:
+                threading.Thread(target=old.close, daemon=True).start()
+
+    def _check(self) -> None:
+        current = self._current
+        if current is not None:
+            try:
+                listing = current.probe(self.probe_timeout)
+            except Exception as e:
+                logger.warning("MCP health check failed, reconnecting: %s", e)
+            else:
+                if listing is None or current.listing in (None, listing):
+                    current.listing = listing
+                    self.healthy, self.last_error = True, None
+                    return
+                logger.info("MCP tool list changed, reconnecting")
+        self._connect(replacing=current)
+
+    def _refresh_loop(self) -> None:
+        while True:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            try:
+                self._check()
+            except Exception as e:
+                logger.warning("MCP reconnect failed: %s", e)
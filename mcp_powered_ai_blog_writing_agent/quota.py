@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from typing import Any
+
+CHARS_PER_TOKEN = 4  # rough estimate; the chat completions call does not hand usage back to the caller
+
+
+def _estimate_tokens(value: Any) -> int:
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str)
+    return len(value) // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Refills at ``per_minute`` units per minute up to one minute's worth.
+
+    ``take`` may drive the level below zero: a call whose real cost is only
+    known afterwards is charged in full, and later callers wait off the debt.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def level(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._level
+
+    def take(self, amount: float) -> None:
+        with self._lock:
+            self._refill()
+            self._level -= amount
+
+    def wait_for(self, amount: float) -> None:
+        """Block until ``amount`` is available, then take it"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._level >= min(amount, self.capacity):
+                    self._level -= amount
+                    return
+                wait = (min(amount, self.capacity) - self._level) / self.rate
+            time.sleep(wait)
+
+    def seconds_until(self, amount: float) -> float:
+        """Time until the bucket has refilled enough to cover ``amount`` more than it holds now"""
+        with self._lock:
+            self._refill()
+            return max(0.0, (amount - self._level) / self.rate)
+
+
+class LLMQuota:
+    """Requests-per-minute and tokens-per-minute budgets of the LLM endpoint.
+
+    ``wrap`` throttles every call of an LLM client against both buckets;
+    ``retry_after`` tells the front end how long a new post would have to wait
+    for quota so it can refuse work it cannot start in time.
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def wrap(self, llm):
+        """Make every model call wait for request and prompt-token quota and charge its completion tokens
+
+        Completion-cache hits do not reach the model, so they are not limited.
+        """
+        name = "uncached_call" if hasattr(llm, "uncached_call") else "call"
+        call = getattr(llm, name)
+
+        def limited_call(messages, *args, **kwargs):
+            self.requests.wait_for(1)
+            self.tokens.wait_for(_estimate_tokens(messages))
+            response = call(messages, *args, **kwargs)
+            self.tokens.take(_estimate_tokens(response))
+            return response
+
+        setattr(llm, name, limited_call)
+        return llm
+
+    def retry_after(self, posts: int, calls_per_post: float, tokens_per_post: float, max_wait: float) -> float:
+        """Seconds to back off before ``posts`` more posts fit into the quota within ``max_wait``; 0 if they fit now"""
+        wait = max(
+            self.requests.seconds_until(posts * calls_per_post),
+            self.tokens.seconds_until(posts * tokens_per_post),
+        )
+        return max(0.0, wait - max_wait)
+
+    def stats(self):
+        return {"requests_available": round(self.requests.level(), 1), "tokens_available": round(self.tokens.level())}
@@ -1,27 +1,961 @@
+import asyncio
+import hashlib
+import json
 import os
-from typing import Annotated, Dict, Any, List
-from pydantic import Field
-from serpapi import GoogleSearch
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import httpx
+import numpy as np
+from pydantic import BaseModel, Field
 from clarifai.runners.models.mcp_class import MCPModelClass
 from fastmcp import FastMCP
-from newspaper import Article
+from newspaper import Article, Config
 
 # Initialize the server
 server = FastMCP("blog_writing_search_mcp")
 
 # SerpAPI key
 SERPAPI_API_KEY = "YOUR_API_KEY"
+SERPAPI_ENDPOINT = os.getenv("SERPAPI_ENDPOINT", "https://serpapi.com/search")
+SERPAPI_TIMEOUT = float(os.getenv("SERPAPI_TIMEOUT", "30"))
+
+# Shared HTTP client settings
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "64"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "32"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "4"))  # concurrent requests to any one host
+
+# Batched search settings
+SEARCH_BATCH_CONCURRENCY = int(os.getenv("SEARCH_BATCH_CONCURRENCY", "4"))
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "10"))
+RRF_K = 60  # Reciprocal-rank-fusion damping constant
+SEARCH_LINKS = 5  # links returned by multi_engine_search
+
+# Keyword research settings
+KEYWORD_SUGGESTIONS = 5
+TRENDS_MAX_KEYWORDS = 5  # Google Trends compares at most five terms per request
+TRENDS_RECENT_POINTS = 4
+KEYWORD_BATCH_MAX_TOPICS = int(os.getenv("KEYWORD_BATCH_MAX_TOPICS", "20"))
+
+# Extraction settings
+PARSE_MAX_WORKERS = int(os.getenv("PARSE_MAX_WORKERS", "2"))  # threads for HTML parsing, dedup and ranking
+EXTRACT_URL_TIMEOUT = float(os.getenv("EXTRACT_URL_TIMEOUT", "10"))
+EXTRACT_DEADLINE = float(os.getenv("EXTRACT_DEADLINE", "20"))
+EXTRACT_MAX_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", str(512 * 1024)))
+
+# Failing domains and URLs (circuit breaker per domain, short-lived negative cache per URL)
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))  # consecutive failures that open a domain's breaker
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "60"))  # doubled each time the probe after it fails
+BREAKER_MAX_COOLDOWN = float(os.getenv("BREAKER_MAX_COOLDOWN", "1800"))
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "600"))
+NEGATIVE_CACHE_ENTRIES = 4096
+_URL_ONLY_STATUSES = {404, 410}  # the page is gone, the host itself is fine
+
+# Cross-article near-duplicate removal (MinHash over word shingles, banded LSH)
+DEDUP_SHINGLE_WORDS = 5
+DEDUP_NUM_PERM = 64
+DEDUP_BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard become candidates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+CHARS_PER_TOKEN = 4  # rough estimate for reporting token savings
+
+# Query-relevant passage selection (BM25 over paragraphs of all extracted articles)
+PASSAGE_BUDGET_CHARS = int(os.getenv("PASSAGE_BUDGET_CHARS", "5000"))  # total across all URLs
+PASSAGE_MAX_CHARS = 800  # longer paragraphs are split into windows of about this size
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Article cache settings (set ARTICLE_CACHE_PATH="" to keep the cache in memory only)
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "blog_writing_search_mcp"))
+ARTICLE_CACHE_PATH = os.getenv("ARTICLE_CACHE_PATH", os.path.join(CACHE_DIR, "articles.sqlite"))
+ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", str(24 * 3600)))
+ARTICLE_CACHE_MAX_BYTES = int(os.getenv("ARTICLE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+ARTICLE_CACHE_MEMORY_ENTRIES = int(os.getenv("ARTICLE_CACHE_MEMORY_ENTRIES", "256"))
+
+# Local full-text corpus of extracted articles (set CORPUS_PATH="" to disable)
+CORPUS_PATH = os.getenv("CORPUS_PATH", os.path.join(CACHE_DIR, "corpus.sqlite"))
+CORPUS_MAX_DOCUMENTS = int(os.getenv("CORPUS_MAX_DOCUMENTS", "10000"))
+CORPUS_MAX_AGE = float(os.getenv("CORPUS_MAX_AGE", str(14 * 24 * 3600)))  # older articles never answer a search
+CORPUS_FIRST = os.getenv("CORPUS_FIRST", "0") == "1"  # default search mode of multi_engine_search
+
+# SERP cache settings (set SERP_CACHE_PATH to share cached results between runner processes)
+SERP_CACHE_PATH = os.getenv("SERP_CACHE_PATH", "")
+SERP_CACHE_MEMORY_ENTRIES = int(os.getenv("SERP_CACHE_MEMORY_ENTRIES", "512"))
+SERP_CACHE_MAX_ROWS = int(os.getenv("SERP_CACHE_MAX_ROWS", "20000"))
+SERP_CACHE_DEFAULT_TTL = float(os.getenv("SERP_CACHE_DEFAULT_TTL", str(3600)))
+# Autocomplete suggestions barely move, organic rankings shift within hours.
+SERP_CACHE_TTLS = {
+    "google_autocomplete": 7 * 24 * 3600,
+    "google_trends": 24 * 3600,
+    "google": 6 * 3600,
+    "bing": 6 * 3600,
+}
+
+_USER_AGENT = Config().browser_user_agent
+# Pages are downloaded through HttpPool; parsing must never go back to the network.
+_PARSE_CONFIG = Config()
+_PARSE_CONFIG.fetch_images = False
+_PARSE_CONFIG.memoize_articles = False
+_HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# Clarifai's MCP runner drives each request with its own asyncio.run(),
+# sometimes on several threads at once, so no asyncio object can be shared
+# between requests. The HTTP client, the per-host semaphores and all in-flight
+# work live on this long-lived loop instead; tool calls hand their work to it
+# through SingleFlight and await the result from whichever loop they run on.
+_io_loop = asyncio.new_event_loop()
+threading.Thread(target=_io_loop.run_forever, name="search-io", daemon=True).start()
+
+# Network I/O never blocks the I/O loop. CPU-bound work (newspaper parsing,
+# dedup, passage ranking) runs on this small executor so one large page cannot
+# stall other tool calls.
+_parse_pool = ThreadPoolExecutor(max_workers=PARSE_MAX_WORKERS, thread_name_prefix="parse")
+
+
+async def _offload(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run CPU-bound ``fn`` on the parse executor."""
+    return await asyncio.get_running_loop().run_in_executor(_parse_pool, fn, *args)
+
+
+async def _gather_limited(limit: int, coros: Iterable[Awaitable[Any]], return_exceptions: bool = False) -> List[Any]:
+    """``asyncio.gather`` that runs at most ``limit`` of ``coros`` at a time."""
+    slots = asyncio.Semaphore(limit)
+
+    async def run(coro: Awaitable[Any]) -> Any:
+        async with slots:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=return_exceptions)
+
+
+try:
+    import h2  # noqa: F401  (optional, enables HTTP/2 in httpx)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+class HttpPool:
+    """Process-wide keep-alive HTTP client shared by every outbound call; used only on ``_io_loop``.
+
+    Connections are pooled by an ``httpx.AsyncClient`` (HTTP/2 when ``h2`` is
+    installed); a semaphore per host caps how many of them a single host may
+    hold. New connections are counted through httpx's trace hook so the reuse
+    ratio can be read from ``stats()``.
+    """
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            http2=_HTTP2,
+            follow_redirects=True,
+            headers={"User-Agent": _USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._slots: Dict[str, asyncio.BoundedSemaphore] = {}
+        self._requests: Dict[str, int] = defaultdict(int)
+        self._connections: Dict[str, int] = defaultdict(int)
+
+    def _slot(self, host: str) -> asyncio.BoundedSemaphore:
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = asyncio.BoundedSemaphore(HTTP_MAX_PER_HOST)
+        return slot
+
+    def _trace(self, host: str):
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            if event == "connection.connect_tcp.complete":
+                self._connections[host] += 1
+        return trace
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        host = (urlsplit(url).hostname or "").lower()
+        async with self._slot(host):
+            self._requests[host] += 1
+            async with self.client.stream(method, url, extensions={"trace": self._trace(host)}, **kwargs) as response:
+                yield response
+
+    async def get_json(self, url: str, **kwargs: Any) -> Any:
+        async with self.stream("GET", url, **kwargs) as response:
+            await response.aread()
+            return response.json()
+
+    def stats(self) -> Dict[str, Any]:
+        # Counters are updated on the I/O loop; read from copies.
+        connections = dict(self._connections)
+        hosts = {
+            host: {"requests": count, "new_connections": connections.get(host, 0)}
+            for host, count in dict(self._requests).items()
+        }
+        requests_total = sum(h["requests"] for h in hosts.values())
+        connections_total = sum(h["new_connections"] for h in hosts.values())
+        return {
+            "http2": _HTTP2,
+            "requests": requests_total,
+            "new_connections": connections_total,
+            "reused_connections": max(requests_total - connections_total, 0),
+            "hosts": hosts,
+        }
+
+
+_http = HttpPool()
+
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def _normalize_url(url: str) -> str:
+    """Canonical form of a URL used as a cache key."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class _LRU:
+    """Thread-safe, size-bounded in-memory LRU map."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ArticleCache:
+    """Two-tier (memory LRU + SQLite) cache of parsed article text keyed by normalized URL.
+
+    Entries older than ``ttl`` are still returned so callers can revalidate them
+    with a conditional GET; the disk tier is trimmed to ``max_bytes`` by evicting
+    the least recently used rows.
+    """
+
+    def __init__(self, path: str, ttl: float, max_bytes: int, memory_entries: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._memory = _LRU(memory_entries)
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS articles (url TEXT PRIMARY KEY, text TEXT, etag TEXT, "
+                "last_modified TEXT, fetched_at REAL, accessed_at REAL, size INTEGER)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS articles_accessed ON articles (accessed_at)")
+            self._db.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(url)
+        if entry is not None or self._db is None:
+            return entry
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT text, etag, last_modified, fetched_at FROM articles WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE articles SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        entry = {"text": row[0], "etag": row[1], "last_modified": row[2], "fetched_at": row[3]}
+        self._memory.put(url, entry)
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def put(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        now = time.time()
+        self._memory.put(url, {"text": text, "etag": etag, "last_modified": last_modified, "fetched_at": now})
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, text, etag, last_modified, now, now, len(text.encode("utf-8"))),
+            )
+            self._evict()
+            self._db.commit()
+
+    def touch(self, url: str) -> None:
+        """Mark a stale entry as fresh again after a 304 Not Modified."""
+        entry = self._memory.get(url)
+        now = time.time()
+        if entry is not None:
+            entry["fetched_at"] = now
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "UPDATE articles SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url)
+                )
+                self._db.commit()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, size FROM articles ORDER BY accessed_at").fetchall()
+        expired = []
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            expired.append((url,))
+            total -= size
+        self._db.executemany("DELETE FROM articles WHERE url = ?", expired)
+
+
+_article_cache = ArticleCache(
+    ARTICLE_CACHE_PATH, ARTICLE_CACHE_TTL, ARTICLE_CACHE_MAX_BYTES, ARTICLE_CACHE_MEMORY_ENTRIES
+)
+
+
+class NegativeCache:
+    """Remembers URLs whose extraction recently failed so repeats fail immediately until ``ttl`` runs out."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.hits = 0
+        self._entries = _LRU(max_entries)
+
+    def get(self, url: str) -> Optional[str]:
+        entry = self._entries.get(url)
+        if entry is None or entry[0] <= time.time():
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, url: str, error: str) -> None:
+        self._entries.put(url, (time.time() + self.ttl, error))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "ttl": self.ttl}
+
+
+class CircuitBreaker:
+    """Per-domain health of article downloads.
+
+    A domain's breaker opens after ``failures`` consecutive failed downloads
+    and requests to it fail immediately. When ``cooldown`` has passed, one
+    request goes through as a probe: success closes the breaker, failure opens
+    it again for twice as long, up to ``max_cooldown``. Domains are forgotten
+    as soon as a download from them succeeds.
+    """
+
+    def __init__(self, failures: int, cooldown: float, max_cooldown: float):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.counters = {"trips": 0, "fast_failures": 0}
+        self._domains: Dict[str, Dict[str, Any]] = {}
+
+    def allow(self, domain: str) -> float:
+        """0 if a request to ``domain`` may go ahead, otherwise the seconds until the next probe"""
+        state = self._domains.get(domain)
+        if state is None or state["failures"] < self.failures:
+            return 0.0
+        now = time.monotonic()
+        if now < state["open_until"]:
+            self.counters["fast_failures"] += 1
+            return state["open_until"] - now
+        # Half-open: let this request probe the domain, and hold everyone else
+        # back until it has had the time a download may take.
+        state["probe"] = True
+        state["open_until"] = now + EXTRACT_URL_TIMEOUT
+        return 0.0
+
+    def record(self, domain: str, ok: bool) -> None:
+        if ok:
+            self._domains.pop(domain, None)
+            return
+        state = self._domains.setdefault(
+            domain, {"failures": 0, "open_until": 0.0, "cooldown": self.cooldown, "probe": False}
+        )
+        state["failures"] += 1
+        if state["failures"] == self.failures:
+            self._open(state)
+        elif state["probe"]:
+            state["cooldown"] = min(state["cooldown"] * 2, self.max_cooldown)
+            self._open(state)
+
+    def _open(self, state: Dict[str, Any]) -> None:
+        state["probe"] = False
+        state["open_until"] = time.monotonic() + state["cooldown"]
+        self.counters["trips"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        domains = dict(self._domains)  # updated on the I/O loop
+        return {
+            **self.counters,
+            "open": {
+                domain: round(max(state["open_until"] - now, 0.0), 1)
+                for domain, state in domains.items() if state["failures"] >= self.failures
+            },
+            "failing": sum(1 for state in domains.values() if state["failures"] < self.failures),
+        }
+
+
+_negative_cache = NegativeCache(NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_ENTRIES)
+_breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_COOLDOWN, BREAKER_MAX_COOLDOWN)
+
+
+def _domain(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _error_message(error: BaseException) -> str:
+    return str(error) or type(error).__name__  # httpx timeouts carry no message
+
+
+class SingleFlight:
+    """Collapses concurrent calls sharing a key into one execution.
+
+    The first caller starts ``fn`` on the I/O loop; callers arriving while it
+    is in flight, from any thread or event loop, await the same future and
+    receive its result, or its exception. A caller that stops waiting
+    (deadline, cancellation) leaves the work running for the others, so its
+    result still reaches the caches.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        with self._lock:
+            self.stats["calls"] += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = asyncio.run_coroutine_threadsafe(fn(*args), _io_loop)
+            else:
+                self.stats["coalesced"] += 1
+        if leader:
+            # Outside the lock: the callback runs right here if the work has already finished.
+            future.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "inflight": len(self._inflight)}
+
+
+def _flight_key(name: str, *args: Any) -> str:
+    return name + ":" + json.dumps(args, sort_keys=True, default=str)
+
+
+# Identical tool calls from concurrent crews share one execution; identical
+# upstream requests (a SERP query, a single URL) issued by different tool calls
+# are collapsed as well.
+_tool_flight = SingleFlight()
+_upstream_flight = SingleFlight()
+
+
+class SerpCache:
+    """TTL cache of SerpAPI responses with a bounded memory tier and an optional shared SQLite tier."""
+
+    def __init__(self, path: str, memory_entries: int, max_rows: int):
+        self.max_rows = max_rows
+        self._memory = _LRU(memory_entries)
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS serp (key TEXT PRIMARY KEY, engine TEXT, response TEXT, expires_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS serp_expires ON serp (expires_at)")
+            self._db.commit()
+
+    @staticmethod
+    def key(params: Dict[str, Any]) -> str:
+        normalized = {
+            k: " ".join(str(v).lower().split()) for k, v in params.items() if k != "api_key" and v is not None
+        }
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM serp WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        response = json.loads(row[0])
+        self._memory.put(key, (row[1], response))
+        return response
+
+    def put(self, key: str, engine: str, response: Dict[str, Any]) -> None:
+        expires_at = time.time() + SERP_CACHE_TTLS.get(engine, SERP_CACHE_DEFAULT_TTL)
+        self._memory.put(key, (expires_at, response))
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO serp VALUES (?, ?, ?, ?)", (key, engine, json.dumps(response), expires_at)
+            )
+            self._db.execute("DELETE FROM serp WHERE expires_at <= ?", (time.time(),))
+            self._db.execute(
+                "DELETE FROM serp WHERE key IN (SELECT key FROM serp ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+            self._db.commit()
+
+
+_serp_cache = SerpCache(SERP_CACHE_PATH, SERP_CACHE_MEMORY_ENTRIES, SERP_CACHE_MAX_ROWS)
+
+
+_STOPWORDS = {"and", "are", "for", "from", "how", "into", "the", "that", "this", "what", "why", "with", "you", "your"}
+
+
+class ArticleCorpus:
+    """SQLite FTS5 index of every article the server has extracted.
+
+    Documents are keyed by normalized URL and ranked with BM25 over title and
+    body (Porter-stemmed). A document is relevant to a query only when it
+    contains every query term, so the corpus answers a search with fewer
+    results rather than loosely related ones. The oldest documents are evicted
+    beyond ``max_documents``.
+    """
+
+    def __init__(self, path: str, max_documents: int):
+        self.max_documents = max_documents
+        self.counters = {"searches": 0, "links_from_corpus": 0, "serp_calls_saved": 0}
+        self._db = None
+        self._db_lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS documents "
+                "(id INTEGER PRIMARY KEY, key TEXT UNIQUE, url TEXT, title TEXT, fetched_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS documents_fetched ON documents (fetched_at)")
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS corpus USING fts5(title, body, tokenize='porter unicode61')"
+            )
+            self._db.commit()
+
+    def add(self, key: str, url: str, title: str, body: str) -> None:
+        if self._db is None:
+            return
+        with self._db_lock:
+            row = self._db.execute("SELECT id FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                doc_id = self._db.execute(
+                    "INSERT INTO documents (key, url, title, fetched_at) VALUES (?, ?, ?, ?)",
+                    (key, url, title, time.time()),
+                ).lastrowid
+            else:
+                doc_id = row[0]
+                self._db.execute("DELETE FROM corpus WHERE rowid = ?", (doc_id,))
+                self._db.execute(
+                    "UPDATE documents SET url = ?, title = ?, fetched_at = ? WHERE id = ?",
+                    (url, title, time.time(), doc_id),
+                )
+            self._db.execute("INSERT INTO corpus (rowid, title, body) VALUES (?, ?, ?)", (doc_id, title, body))
+            self._evict()
+            self._db.commit()
+
+    def touch(self, key: str) -> None:
+        """Record that a stored article was confirmed unchanged (304 Not Modified)."""
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute("UPDATE documents SET fetched_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+    def _evict(self) -> None:
+        excess = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0] - self.max_documents
+        if excess <= 0:
+            return
+        expired = self._db.execute("SELECT id FROM documents ORDER BY fetched_at LIMIT ?", (excess,)).fetchall()
+        self._db.executemany("DELETE FROM corpus WHERE rowid = ?", expired)
+        self._db.executemany("DELETE FROM documents WHERE id = ?", expired)
+
+    def search(self, query: str, limit: int, fetched_after: float) -> List[str]:
+        """URLs of up to ``limit`` documents fetched after ``fetched_after`` that contain every query term."""
+        terms = [t for t in dict.fromkeys(_WORD_RE.findall(query.lower())) if len(t) > 2 and t not in _STOPWORDS]
+        if self._db is None or not terms:
+            return []
+        match = " AND ".join(f'"{term}"' for term in terms)
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT d.url FROM corpus JOIN documents d ON d.id = corpus.rowid "
+                "WHERE corpus MATCH ? AND d.fetched_at > ? ORDER BY bm25(corpus, 5.0, 1.0) LIMIT ?",
+                (match, fetched_after, limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        documents = 0
+        if self._db is not None:
+            with self._db_lock:
+                documents = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return {"documents": documents, **self.counters}
+
+
+_corpus = ArticleCorpus(CORPUS_PATH, CORPUS_MAX_DOCUMENTS)
+
+
+async def _serp_search(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a SerpAPI query, answering from the SERP cache when possible."""
+    key = SerpCache.key(params)
+    results = await asyncio.to_thread(_serp_cache.get, key)
+    if results is None:
+        results = await _upstream_flight.do("serp:" + key, _serp_fetch, key, params)
+    return results
+
+
+async def _serp_fetch(key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    # Same request the serpapi client library makes, sent over the shared pool.
+    results = await _http.get_json(
+        SERPAPI_ENDPOINT, params={**params, "output": "json", "source": "python"}, timeout=SERPAPI_TIMEOUT
+    )
+    if "error" not in results:
+        await asyncio.to_thread(_serp_cache.put, key, params.get("engine", "google"), results)
+    return results
+
+
+_MINHASH_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_minhash_rng = np.random.default_rng(20240601)
+_MINHASH_A = _minhash_rng.integers(1, 2 ** 31, size=(DEDUP_NUM_PERM, 1), dtype=np.uint64)
+_MINHASH_B = _minhash_rng.integers(0, 2 ** 31, size=(DEDUP_NUM_PERM, 1), dtype=np.uint64)
+_WORD_RE = re.compile(r"\w+")
+
+
+def _paragraphs(text: str) -> List[str]:
+    return [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+
+
+def _minhash(paragraph: str) -> np.ndarray:
+    words = _WORD_RE.findall(paragraph.lower())
+    n = max(len(words) - DEDUP_SHINGLE_WORDS + 1, 1)
+    shingles = np.fromiter(
+        (zlib.crc32(" ".join(words[i:i + DEDUP_SHINGLE_WORDS]).encode("utf-8")) for i in range(n)),
+        dtype=np.uint64, count=n,
+    )
+    # One row per permutation: (a * x + b) mod p over every shingle, keep the minimum.
+    return ((_MINHASH_A * shingles + _MINHASH_B) % _MINHASH_PRIME).min(axis=1)
+
+
+def _dedupe_documents(texts: Dict[str, str]) -> Dict[str, Any]:
+    """Drop paragraphs that near-duplicate an earlier paragraph of any document.
+
+    Documents are processed in order, so the first occurrence of syndicated
+    text or shared boilerplate is kept and later copies are removed.
+    """
+    rows = DEDUP_NUM_PERM // DEDUP_BANDS
+    buckets: Dict[bytes, List[int]] = defaultdict(list)
+    signatures: List[np.ndarray] = []
+    deduped = {}
+    chars_removed = 0
+
+    for url, text in texts.items():
+        kept = []
+        for paragraph in _paragraphs(text):
+            signature = _minhash(paragraph)
+            keys = [bytes([band]) + signature[band * rows:(band + 1) * rows].tobytes() for band in range(DEDUP_BANDS)]
+            candidates = {j for key in keys for j in buckets.get(key, ())}
+            if any(np.mean(signatures[j] == signature) >= DEDUP_THRESHOLD for j in candidates):
+                chars_removed += len(paragraph)
+                continue
+            for key in keys:
+                buckets[key].append(len(signatures))
+            signatures.append(signature)
+            kept.append(paragraph)
+        deduped[url] = "\n\n".join(kept)
+
+    return {"texts": deduped, "chars_removed": chars_removed}
+
+
+def _word_cut(text: str, limit: int) -> int:
+    """Index at which to cut ``text`` to at most ``limit`` characters, at a space if one is near the end."""
+    cut = text.rfind(" ", 0, limit)
+    return cut if cut > limit // 2 else limit
+
+
+def _passages(text: str) -> List[str]:
+    passages = []
+    for paragraph in _paragraphs(text):
+        while len(paragraph) > PASSAGE_MAX_CHARS:
+            cut = _word_cut(paragraph, PASSAGE_MAX_CHARS)
+            passages.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if paragraph:
+            passages.append(paragraph)
+    return passages
+
+
+def _bm25_scores(query: str, passages: List[str]) -> np.ndarray:
+    """BM25 score of every passage for ``query``, treating the passages as the corpus."""
+    terms = list(dict.fromkeys(_WORD_RE.findall(query.lower())))
+    if not terms or not passages:
+        return np.zeros(len(passages))
+    term_index = {term: i for i, term in enumerate(terms)}
+
+    tokens = [_WORD_RE.findall(passage.lower()) for passage in passages]
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.float64, count=len(tokens))
+    hits = [(p, term_index[word]) for p, words in enumerate(tokens) for word in words if word in term_index]
+    tf = np.zeros((len(passages), len(terms)))
+    if hits:
+        rows, cols = np.array(hits).T
+        np.add.at(tf, (rows, cols), 1)
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((len(passages) - df + 0.5) / (df + 0.5) + 1.0)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+    return (tf * (BM25_K1 + 1) / (tf + norm[:, None]) * idf).sum(axis=1)
+
+
+def _select_passages(texts: Dict[str, str], query: str, budget: int) -> Dict[str, Any]:
+    """Fill ``budget`` characters with passages of all documents, best matches for ``query`` first.
+
+    Every document first gets its best-matching passage (its leading one when
+    nothing in it matches), cut down to an equal share of the budget if need
+    be. The rest of the budget goes to the other matching passages by score,
+    then to the leading passages of each document, one per document in turn.
+    """
+    units = [(url, i, passage) for url, text in texts.items() for i, passage in enumerate(_passages(text))]
+    scores = _bm25_scores(query, [passage for _, _, passage in units])
+    by_score = [k for k in np.argsort(-scores, kind="stable") if scores[k] > 0]
+    round_robin = sorted(range(len(units)), key=lambda k: units[k][1])
+    order = by_score + round_robin
+
+    leads: Dict[str, int] = {}
+    for k in order:
+        leads.setdefault(units[k][0], k)
+    share = budget // max(len(leads), 1) - 2  # paragraph separator
+
+    chosen: Dict[int, str] = {}
+    remaining = budget
+    for k in leads.values():
+        passage = units[k][2]
+        if len(passage) > share:
+            passage = passage[:_word_cut(passage, share)].strip() if share > 0 else ""
+        if passage:
+            chosen[k] = passage
+            remaining -= len(passage) + 2
+    for k in order:
+        size = len(units[k][2]) + 2
+        if k not in chosen and size <= remaining:
+            chosen[k] = units[k][2]
+            remaining -= size
+
+    selected: Dict[str, List[str]] = {url: [] for url in texts}
+    for k in sorted(chosen):  # units are in document order
+        selected[units[k][0]].append(chosen[k])
+    return {
+        "texts": {url: "\n\n".join(passages) for url, passages in selected.items()},
+        "passages": len(chosen),
+        "chars": budget - remaining,
+    }
+
+
+async def _fetch_html(url: str, validators: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Stream an HTML page, reading at most EXTRACT_MAX_BYTES of it.
+
+    ``validators`` are conditional request headers (If-None-Match /
+    If-Modified-Since); a 304 reply comes back with ``not_modified`` set.
+    """
+    headers = {"Accept": "text/html,application/xhtml+xml", **(validators or {})}
+    async with _http.stream("GET", url, headers=headers, timeout=EXTRACT_URL_TIMEOUT) as response:
+        page = {
+            "html": None, "error": None, "fetched": 0, "skipped": 0, "not_modified": False,
+            "etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified"),
+        }
+        if response.status_code == 304:
+            return {**page, "not_modified": True}
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        declared = response.headers.get("Content-Length", "")
+        declared = int(declared) if declared.isdigit() else 0
+
+        mime = content_type.split(";")[0].strip().lower()
+        if mime and mime not in _HTML_CONTENT_TYPES:
+            return {**page, "error": f"unsupported content type: {mime}", "skipped": declared}
+
+        body = bytearray()
+        async for chunk in response.aiter_bytes(chunk_size=16 * 1024):
+            body += chunk
+            if len(body) >= EXTRACT_MAX_BYTES:
+                del body[EXTRACT_MAX_BYTES:]
+                break
+
+        # Bytes off the wire, so it stays comparable to Content-Length for gzip bodies.
+        fetched = response.num_bytes_downloaded
+        charset = _CHARSET_RE.search(content_type)
+        try:
+            html = body.decode(charset.group(1) if charset else "utf-8", errors="replace")
+        except LookupError:
+            html = body.decode("utf-8", errors="replace")
+
+    return {**page, "html": html, "fetched": fetched, "skipped": max(declared - fetched, 0)}
+
+
+async def _extract_article(url: str) -> Dict[str, Any]:
+    return await _upstream_flight.do("url:" + _normalize_url(url), _extract_article_uncoalesced, url)
+
+
+async def _extract_article_uncoalesced(url: str) -> Dict[str, Any]:
+    key = _normalize_url(url)
+    cached = await asyncio.to_thread(_article_cache.get, key)
+    if cached is not None and _article_cache.is_fresh(cached):
+        return {"text": cached["text"], "error": None, "fetched": 0, "skipped": 0, "cache": "hit"}
+
+    # Known-bad URLs and domains fail here instead of waiting out the network timeout again.
+    error = _negative_cache.get(key)
+    if error is not None:
+        return {"text": None, "error": error, "fetched": 0, "skipped": 0, "cache": "negative"}
+    domain = _domain(url)
+    retry_in = _breaker.allow(domain)
+    if retry_in:
+        error = f"{domain} keeps failing; skipped for another {retry_in:.0f}s"
+        return {"text": None, "error": error, "fetched": 0, "skipped": 0, "cache": "circuit_open"}
+
+    validators = {}
+    if cached is not None:
+        if cached["etag"]:
+            validators["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            validators["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        page = await _fetch_html(url, validators)
+    except Exception as e:
+        # Timeouts, resets, 403s and 5xx count against the domain; a missing page only against its URL.
+        if not (isinstance(e, httpx.HTTPStatusError) and e.response.status_code in _URL_ONLY_STATUSES):
+            _breaker.record(domain, False)
+        _negative_cache.put(key, _error_message(e))
+        raise
+
+    if page["not_modified"] and cached is not None:
+        _breaker.record(domain, True)
+        await asyncio.to_thread(_article_cache.touch, key)
+        await asyncio.to_thread(_corpus.touch, key)
+        return {**page, "text": cached["text"], "cache": "revalidated"}
+    if page["error"]:
+        _breaker.record(domain, True)
+        _negative_cache.put(key, page["error"])
+        return {**page, "text": None, "cache": "miss"}
+
+    article = await _offload(_parse_article, url, page["html"])
+    text = article["text"]
+    if not text.strip():
+        # Paywalls and script-rendered pages parse to nothing, usually for the whole domain.
+        error = "no article text found (paywalled or rendered by script)"
+        _breaker.record(domain, False)
+        _negative_cache.put(key, error)
+        return {**page, "text": None, "error": error, "cache": "miss"}
+    _breaker.record(domain, True)
+    await asyncio.to_thread(_article_cache.put, key, text, page["etag"], page["last_modified"])
+    await asyncio.to_thread(_corpus.add, key, url, article["title"], text)
+    return {**page, "text": text, "cache": "miss"}
+
+
+def _parse_article(url: str, html: str) -> Dict[str, str]:
+    article = Article(url, config=_PARSE_CONFIG)
+    article.download(input_html=html)
+    article.parse()
+    return {"title": article.title or "", "text": article.text}
+
 
 @server.tool(
     "multi_engine_search",
-    description="Query a search engine and return the top 5 blog/article links based on a search query."
+    description="Query a search engine and return the top 5 blog/article links based on a search query. "
+                "With corpus_first, recently extracted articles matching every query term are returned first "
+                "and the search engine is only queried for the remaining links."
 )
-def multi_engine_search(
+async def multi_engine_search(
     query: Annotated[str, Field(description="Search query.")],
     engine: Annotated[str, Field(description="Search engine to use (e.g., 'google').")] = "google",
     location: Annotated[str, Field(description="Geographic location for the search.")] = "United States",
-    device: Annotated[str, Field(description="Device type for the search ('desktop' or 'mobile').")] = "desktop"
+    device: Annotated[str, Field(description="Device type for the search ('desktop' or 'mobile').")] = "desktop",
+    corpus_first: Annotated[bool, Field(description="Answer from previously extracted articles before "
+                                                    "querying the search engine.")] = CORPUS_FIRST
 ) -> List[str]:
+    return await _tool_flight.do(
+        _flight_key("multi_engine_search", query, engine, location, device, corpus_first),
+        _search_links, query, engine, location, device, corpus_first
+    )
+
+
+async def _search_links(query: str, engine: str, location: str, device: str, corpus_first: bool = False) -> List[str]:
+    links = []
+    if corpus_first:
+        _corpus.counters["searches"] += 1
+        links = await asyncio.to_thread(_corpus.search, query, SEARCH_LINKS, time.time() - CORPUS_MAX_AGE)
+        _corpus.counters["links_from_corpus"] += len(links)
+        if len(links) >= SEARCH_LINKS:
+            _corpus.counters["serp_calls_saved"] += 1
+            return links
+    try:
+        results = await _organic_results(query, engine, location, device)
+    except RuntimeError:
+        return links
+    except Exception:
+        # SerpAPI unreachable or answering garbage: corpus hits are still worth returning.
+        if links:
+            return links
+        raise
+    seen = {_normalize_url(link) for link in links}
+    links += [result["link"] for result in results if _normalize_url(result["link"]) not in seen]
+    return links[:SEARCH_LINKS]
+
+
+async def _organic_results(query: str, engine: str, location: str, device: str) -> List[Dict[str, Any]]:
     params = {
         "api_key": SERPAPI_API_KEY,
         "engine": engine,
@@ -29,82 +963,295 @@ def multi_engine_search(
         "location": location,
         "device": device
     }
-    search = GoogleSearch(params)
-    results = search.get_dict()
+    results = await _serp_search(params)
+    if "error" in results:
+        raise RuntimeError(results["error"])
+    return [result for result in results.get("organic_results", []) if result.get("link")]
 
-    links = []
-    for result in results.get("organic_results", [])[:5]:
-        link = result.get("link")
-        if link:
-            links.append(link)
 
-    return links
+class SearchQuery(BaseModel):
+    query: str = Field(description="Search query.")
+    engine: str = Field("google", description="Search engine to use (e.g., 'google').")
+    location: str = Field("United States", description="Geographic location for the search.")
+    device: str = Field("desktop", description="Device type for the search ('desktop' or 'mobile').")
+
+
+@server.tool(
+    "batch_multi_engine_search",
+    description="Run several searches at once and return one deduplicated, ranked list of blog/article links. "
+                "Use this instead of repeated multi_engine_search calls when covering several angles of a topic."
+)
+async def batch_multi_engine_search(
+    searches: Annotated[List[SearchQuery], Field(description="Searches to run, each with its own query, engine, location and device.")],
+    max_results: Annotated[int, Field(description="Maximum number of links to return.")] = 10
+) -> Dict[str, Any]:
+    searches = searches[:SEARCH_BATCH_MAX_QUERIES]
+    outcomes = await _gather_limited(
+        SEARCH_BATCH_CONCURRENCY,
+        [_organic_results(s.query, s.engine, s.location, s.device) for s in searches],
+        return_exceptions=True,
+    )
+
+    # Reciprocal rank fusion: a link ranked well by several queries beats one
+    # that tops a single query.
+    ranked: Dict[str, Dict[str, Any]] = {}
+    errors = {}
+    for search, results in zip(searches, outcomes):
+        if isinstance(results, Exception):
+            errors[search.query] = _error_message(results)
+            continue
+        for rank, result in enumerate(results, start=1):
+            entry = ranked.setdefault(_normalize_url(result["link"]), {
+                "link": result["link"], "title": result.get("title", ""), "score": 0.0, "queries": []
+            })
+            entry["score"] += 1.0 / (RRF_K + rank)
+            if search.query not in entry["queries"]:
+                entry["queries"].append(search.query)
+
+    results = sorted(ranked.values(), key=lambda entry: entry["score"], reverse=True)[:max_results]
+    for entry in results:
+        entry["score"] = round(entry["score"], 4)
+    return {"results": results, "errors": errors}
+
 
 @server.tool(
     "extract_web_content_from_links",
-    description="Extracts main article content from a list of blog or article URLs using newspaper3k."
+    description="Extracts main article content from a list of blog or article URLs using newspaper3k. "
+                "URLs are fetched concurrently with a byte cap per page; anything not finished by the deadline "
+                "is reported as 'timeout'. Returns the passages most relevant to the query, within a total "
+                "character or token budget shared by all URLs."
 )
-def extract_web_content_from_links(
-    urls: Annotated[List[str], Field(description="List of blog/article URLs to extract content from.")]
-) -> Dict[str, str]:
+async def extract_web_content_from_links(
+    urls: Annotated[List[str], Field(description="List of blog/article URLs to extract content from.")],
+    query: Annotated[str, Field(description="Search query or topic used to rank passages; "
+                                            "empty keeps the leading passages.")] = "",
+    max_chars: Annotated[int, Field(description="Total characters of content to return across all URLs.")]
+        = PASSAGE_BUDGET_CHARS,
+    max_tokens: Annotated[int, Field(description="Total token budget; overrides max_chars when set.")] = 0
+) -> Dict[str, Any]:
+    budget = max_tokens * CHARS_PER_TOKEN if max_tokens > 0 else max_chars
+    return await _tool_flight.do(
+        _flight_key("extract_web_content_from_links", urls, query, budget), _extract_content, urls, query, budget
+    )
+
+
+async def _extract_content(urls: List[str], query: str = "", budget: int = PASSAGE_BUDGET_CHARS) -> Dict[str, Any]:
+    # Spellings of one page (fragments, tracking parameters) are fetched once, under the first of them.
+    canonical: Dict[str, str] = {}
+    for url in urls:
+        canonical.setdefault(_normalize_url(url), url)
+    tasks = {asyncio.ensure_future(_extract_article(url)): url for url in canonical.values()}
+    done = (await asyncio.wait(tasks, timeout=EXTRACT_DEADLINE))[0] if tasks else set()
+
     extracted = {}
+    status = {}
+    stats = {
+        "bytes_fetched": 0, "bytes_skipped": 0, "cache_hit": 0, "cache_miss": 0, "cache_revalidated": 0,
+        "cache_negative": 0, "cache_circuit_open": 0,
+    }
+    texts = {}
+    for task, url in tasks.items():
+        if task not in done:
+            task.cancel()  # stops waiting only; the download itself finishes and fills the cache
+            status[url] = "timeout"
+            continue
+        if task.exception() is not None:
+            status[url] = f"Error extracting content: {_error_message(task.exception())}"
+            continue
+
+        page = task.result()
+        stats["bytes_fetched"] += page["fetched"]
+        stats["bytes_skipped"] += page["skipped"]
+        stats[f"cache_{page['cache']}"] += 1
+        if page["text"] is None:
+            status[url] = f"Error extracting content: {page['error']}"
+        else:
+            texts[url] = page["text"]
+            status[url] = "ok"
+
+    selection = await _offload(_condense, texts, query, budget)
+    stats["dedup_chars_saved"] = selection["dedup_chars_removed"]
+    stats["dedup_tokens_saved"] = selection["dedup_chars_removed"] // CHARS_PER_TOKEN
+    stats["passages_selected"] = selection["passages"]
+    stats["chars_returned"] = selection["chars"]
+    extracted.update(selection["texts"])
 
     for url in urls:
-        try:
-            article = Article(url)
-            article.download()
-            article.parse()
-            extracted[url] = article.text[:1000]  # Limit to first 1000 characters
-        except Exception as e:
-            extracted[url] = f"Error extracting content: {str(e)}"
+        first = canonical[_normalize_url(url)]
+        status[url] = status[first]
+        if first in extracted:
+            extracted[url] = extracted[first]
+    return {"content": extracted, "status": status, "stats": stats}
+
+
+def _condense(texts: Dict[str, str], query: str, budget: int) -> Dict[str, Any]:
+    """Drop cross-article duplicates, then keep the passages that best match ``query`` within ``budget``."""
+    dedup = _dedupe_documents(texts)
+    return {**_select_passages(dedup["texts"], query, budget), "dedup_chars_removed": dedup["chars_removed"]}
 
-    return extracted
 
 @server.tool(
     "keyword_research",
     description="Automate keyword research to find high-potential keywords based on a topic, using autocomplete and trends."
 )
-def keyword_research(
+async def keyword_research(
     topic: Annotated[str, Field(description="Blog topic to research keywords for.")]
 ) -> List[Dict[str, Any]]:
+    return await _tool_flight.do(_flight_key("keyword_research", topic), _keyword_research, topic)
+
+
+async def _keyword_research(topic: str) -> List[Dict[str, Any]]:
+    return (await _keyword_research_batch([topic]))[topic]
+
+
+@server.tool(
+    "keyword_research_batch",
+    description="Keyword research for many topics at once. Suggestions from all topics are packed into as few "
+                "trends requests as possible; each keyword is scored on its latest, recent-mean, trend slope and "
+                "peak interest."
+)
+async def keyword_research_batch(
+    topics: Annotated[List[str], Field(description="Blog topics to research keywords for.")]
+) -> Dict[str, List[Dict[str, Any]]]:
+    return await _tool_flight.do(_flight_key("keyword_research_batch", topics), _keyword_research_batch, topics)
+
+
+async def _keyword_research_batch(topics: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    topics = list(dict.fromkeys(topics))[:KEYWORD_BATCH_MAX_TOPICS]
+    # A failed autocomplete request only costs its own topic, which reports an error entry.
+    results = await _gather_limited(SEARCH_BATCH_CONCURRENCY, map(_autocomplete, topics), return_exceptions=True)
+    suggestions = {
+        topic: [] if isinstance(result, Exception) else result for topic, result in zip(topics, results)
+    }
+
+    keywords = list(dict.fromkeys(k for topic in topics for k in suggestions[topic]))
+    packs = [keywords[i:i + TRENDS_MAX_KEYWORDS] for i in range(0, len(keywords), TRENDS_MAX_KEYWORDS)]
+    scores: Dict[str, Dict[str, Any]] = {}
+    # A failed trends request only costs its own pack its scores; those keywords report "N/A".
+    packs_scores = await _gather_limited(SEARCH_BATCH_CONCURRENCY, map(_trends_scores, packs), return_exceptions=True)
+    for pack_scores in packs_scores:
+        if not isinstance(pack_scores, Exception):
+            scores.update(pack_scores)
+
+    not_available = {
+        "relative_popularity_score": "N/A", "recent_mean": "N/A", "slope": "N/A", "peak": "N/A"
+    }
+    research = {}
+    for topic in topics:
+        if not suggestions[topic]:
+            research[topic] = [{"error": "Could not fetch keyword suggestions."}]
+            continue
+        research[topic] = [
+            {"keyword": keyword, **scores.get(keyword, not_available)} for keyword in suggestions[topic]
+        ]
+    return research
+
+
+async def _autocomplete(topic: str) -> List[str]:
     autocomplete_params = {
         "api_key": SERPAPI_API_KEY,
         "engine": "google_autocomplete",
         "q": topic,
     }
-    search = GoogleSearch(autocomplete_params)
-    autocomplete_results = search.get_dict()
-    suggestions = [item['value'] for item in autocomplete_results.get('suggestions', [])[:5]]
+    autocomplete_results = await _serp_search(autocomplete_params)
+    return [item['value'] for item in autocomplete_results.get('suggestions', [])[:KEYWORD_SUGGESTIONS]]
 
-    if not suggestions:
-        return [{"error": "Could not fetch keyword suggestions."}]
 
+async def _trends_scores(keywords: List[str]) -> Dict[str, Dict[str, Any]]:
     trends_params = {
         "api_key": SERPAPI_API_KEY,
         "engine": "google_trends",
-        "q": ", ".join(suggestions),
+        "q": ", ".join(keywords),
         "data_type": "TIMESERIES"
     }
-    search = GoogleSearch(trends_params)
-    trends_results = search.get_dict()
-
-    keyword_data = []
-    if "interest_over_time" in trends_results:
-        timeline_data = trends_results["interest_over_time"].get("timeline_data", [])
-        for i, keyword in enumerate(suggestions):
-            last_value = timeline_data[-1]['values'][i].get('value') if timeline_data else "N/A"
-            keyword_data.append({
-                "keyword": keyword,
-                "relative_popularity_score": last_value
-            })
+    trends_results = await _serp_search(trends_params)
+    timeline_data = trends_results.get("interest_over_time", {}).get("timeline_data", [])
+    # Rows are time points, columns are keywords, in request order. Keywords
+    # without a column in every point (SerpAPI may drop some) go unscored.
+    keywords = keywords[:min((len(point.get("values", [])) for point in timeline_data), default=0)]
+    if not keywords:
+        return {}
+    values = np.array(
+        [[_trend_value(point["values"][i]) for i in range(len(keywords))] for point in timeline_data],
+        dtype=float,
+    )
+    t = np.arange(len(values), dtype=float)
+    t -= t.mean()
+    denominator = float(t @ t) or 1.0
+    slope = (t @ (values - values.mean(axis=0))) / denominator
+    recent_mean = values[-TRENDS_RECENT_POINTS:].mean(axis=0)
+    peak = values.max(axis=0)
+
+    return {
+        keyword: {
+            "relative_popularity_score": int(values[-1, i]),
+            "recent_mean": round(float(recent_mean[i]), 2),
+            "slope": round(float(slope[i]), 3),
+            "peak": int(peak[i]),
+        }
+        for i, keyword in enumerate(keywords)
+    }
+
+
+def _trend_value(value: Dict[str, Any]) -> float:
+    if "extracted_value" in value:
+        return float(value["extracted_value"])
+    raw = str(value.get("value", "0"))  # "<1" means below the reporting threshold
+    return float(raw) if raw.replace(".", "", 1).isdigit() else 0.0
+
+
+@server.tool(
+    "research_topic",
+    description="One-shot research for a blog topic: searches for top articles, extracts their content and runs "
+                "keyword research in parallel, returning a single compact research bundle."
+)
+async def research_topic(
+    topic: Annotated[str, Field(description="Blog topic to research.")],
+    num_articles: Annotated[int, Field(description="Number of articles to search for and extract.")] = 5,
+    engine: Annotated[str, Field(description="Search engine to use (e.g., 'google').")] = "google",
+    location: Annotated[str, Field(description="Geographic location for the search.")] = "United States"
+) -> Dict[str, Any]:
+    return await _tool_flight.do(
+        _flight_key("research_topic", topic, num_articles, engine, location),
+        _research_topic, topic, num_articles, engine, location
+    )
+
+
+async def _research_topic(topic: str, num_articles: int, engine: str, location: str) -> Dict[str, Any]:
+    keywords = asyncio.ensure_future(_keyword_research(topic))
+
+    try:
+        sources = (await _organic_results(topic, engine, location, "desktop"))[:num_articles]
+    except Exception as e:
+        # Reported in the payload so the keyword research still gets awaited and returned.
+        sources = []
+        search_error = _error_message(e)
     else:
-        for keyword in suggestions:
-            keyword_data.append({
-                "keyword": keyword,
-                "relative_popularity_score": "N/A"
-            })
+        search_error = None
+    extraction = await _extract_content([source["link"] for source in sources], topic)
+
+    return {
+        "topic": topic,
+        "sources": [{"link": source["link"], "title": source.get("title", "")} for source in sources],
+        "articles": extraction["content"],
+        "status": extraction["status"],
+        "keywords": await keywords,
+        "search_error": search_error,
+        "stats": extraction["stats"],
+    }
+
+
+@server.resource("stats://server", description="Process-wide counters for the search server.")
+def server_stats() -> Dict[str, Any]:
+    return {
+        "tool_single_flight": _tool_flight.snapshot(),
+        "upstream_single_flight": _upstream_flight.snapshot(),
+        "http": _http.stats(),
+        "circuit_breaker": _breaker.stats(),
+        "negative_cache": _negative_cache.stats(),
+        "corpus": _corpus.stats(),
+    }
 
-    return keyword_data
 
 class MyModelClass(MCPModelClass):
     def get_server(self) -> FastMCP:
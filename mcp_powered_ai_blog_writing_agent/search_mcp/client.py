@@ -58,10 +58,13 @@ async def main():
                 "https://www.foreseemed.com/artificial-intelligence-in-healthcare",
                 "https://news.harvard.edu/gazette/story/2025/03/how-ai-is-transforming-medicine-healthcare/"
             ]
-            result = await client.call_tool("extract_web_content_from_links", {"urls": links})
+            result = await client.call_tool(
+                "extract_web_content_from_links", {"urls": links, "query": "AI in healthcare", "max_chars": 3000}
+            )
             response_data = json.loads(result[0].text)
-            for url, content in response_data.items():
-                print(f"\nURL: {url}\nExtracted Content (first 500 chars):\n{content[:500]}")
+            for url, status in response_data["status"].items():
+                content = response_data["content"].get(url, "")
+                print(f"\nURL: {url} [{status}]\nExtracted Content (first 500 chars):\n{content[:500]}")
         except Exception as e:
             print(f"Error: {e}")
 
@@ -81,6 +84,16 @@ async def main():
         except Exception as e:
             print(f"Error: {e}")
 
+        print("\n" + "="*50 + "\n")
+
+        # 5. Server counters
+        print("Server stats:")
+        try:
+            result = await client.read_resource("stats://server")
+            print(json.dumps(json.loads(result[0].text), indent=2))
+        except Exception as e:
+            print(f"Error: {e}")
+
 if __name__ == "__main__":
     asyncio.run(main())
 
@@ -0,0 +1,110 @@
+# Copied, not imported: ai_blog_writing_agent/ and mcp_powered_ai_blog_writing_agent/ are
+# each run on their own from their directory, so both keep this module. Keep the copies identical.
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import streamlit as st
+
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent, TaskCompletedEvent, TaskStartedEvent
+except ImportError:  # crewai < 0.150
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent, TaskCompletedEvent, TaskStartedEvent
+
+# Event sources (tasks and streaming LLMs) of every run in progress, mapped to that run's queue.
+# The handlers below are registered once per process; each run only sees its own events even
+# when several browser sessions generate at the same time.
+_sinks: Dict[int, "queue.Queue[Tuple[str, Any]]"] = {}
+_sinks_lock = threading.Lock()
+
+
+def _sink(source: Any):
+    with _sinks_lock:
+        return _sinks.get(id(source))
+
+
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event):
+    sink = _sink(source)
+    if sink is not None:
+        sink.put(("stage_started", source))
+
+
+@crewai_event_bus.on(TaskCompletedEvent)
+def _on_task_completed(source, event):
+    sink = _sink(source)
+    if sink is not None:
+        sink.put(("stage_finished", source))
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _on_chunk(source, event):
+    sink = _sink(source)
+    if sink is not None:
+        sink.put(("token", event.chunk))
+
+
+def stream_crew(crew, stream_llm=None, kickoff=None) -> Iterator[Tuple[str, Any]]:
+    """Run ``crew.kickoff()`` (or ``kickoff()`` if given) in a worker thread and yield its progress.
+
+    Yields ``("stage_started", task)``, ``("stage_finished", task)`` and, for
+    chunks produced by ``stream_llm`` (an ``LLM(stream=True)`` used by the final
+    agent), ``("token", text)``; ends with ``("done", result)`` or ``("error", exc)``.
+    """
+    events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+    sources = list(crew.tasks) + ([stream_llm] if stream_llm is not None else [])
+    with _sinks_lock:
+        for source in sources:
+            _sinks[id(source)] = events
+
+    def run():
+        try:
+            events.put(("done", kickoff() if kickoff else crew.kickoff()))
+        except Exception as e:
+            events.put(("error", e))
+
+    threading.Thread(target=run, name="crew-kickoff", daemon=True).start()
+    try:
+        while True:
+            kind, payload = events.get()
+            yield kind, payload
+            if kind in ("done", "error"):
+                return
+    finally:
+        with _sinks_lock:
+            for source in sources:
+                _sinks.pop(id(source), None)
+
+
+def render_crew_stream(crew, stage_labels: List[str], stream_llm=None, kickoff=None, refresh_interval: float = 0.05):
+    """Run the crew while showing per-stage progress and the final stage's tokens live.
+
+    ``stage_labels`` names ``crew.tasks`` in order. Returns the crew result once
+    the run finishes; re-raises the run's exception if it fails.
+    """
+    labels = {id(task): label for task, label in zip(crew.tasks, stage_labels)}
+    status = st.status("Starting agents...", expanded=True)
+    preview = st.empty()
+    tokens: List[str] = []
+    last_render = 0.0
+
+    for kind, payload in stream_crew(crew, stream_llm, kickoff):
+        if kind == "stage_started":
+            status.update(label=f"{labels[id(payload)]}...")
+            status.write(f"▶️ {labels[id(payload)]} started")
+        elif kind == "stage_finished":
+            status.write(f"✅ {labels[id(payload)]} finished")
+        elif kind == "token":
+            tokens.append(payload)
+            if time.monotonic() - last_render >= refresh_interval:
+                preview.markdown("".join(tokens))
+                last_render = time.monotonic()
+        elif kind == "error":
+            status.update(label="Generation failed", state="error")
+            raise payload
+        else:
+            status.update(label="All stages finished", state="complete", expanded=False)
+            preview.empty()
+            return payload
@@ -0,0 +1,308 @@
+# Copied, not imported: ai_blog_writing_agent/ and mcp_powered_ai_blog_writing_agent/ are
+# each run on their own from their directory, so both keep this module. Keep the copies identical.
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    from crewai.events import (
+        crewai_event_bus, LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent, TaskCompletedEvent,
+        TaskFailedEvent, TaskStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent,
+    )
+except ImportError:  # crewai < 0.150
+    from crewai.utilities.events import (
+        crewai_event_bus, LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent, TaskCompletedEvent,
+        TaskFailedEvent, TaskStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent,
+    )
+
+CHARS_PER_TOKEN = 4  # rough estimate used when the LLM response carries no usage block
+
+
+def _size(value: Any) -> int:
+    if value is None:
+        return 0
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str)
+    return len(value.encode("utf-8"))
+
+
+def _task_id(source: Any, event: Any) -> Optional[str]:
+    """Id of the task an event belongs to.
+
+    crewai 1.x runs synchronous handlers on a thread pool and sends LLM events
+    without ``from_task`` but with ``task_id``; older releases pass the task.
+    """
+    task_id = getattr(event, "task_id", None)
+    if task_id:
+        return str(task_id)
+    task = getattr(event, "from_task", None) or getattr(event, "task", None) or getattr(source, "task", None) or source
+    return str(task.id) if getattr(task, "id", None) is not None else None
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RunTrace:
+    """Spans recorded for one ``Crew.kickoff`` (crew, task, LLM call and tool call spans)."""
+
+    def __init__(self, topic: str):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.topic = topic
+        self.started = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self._open: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.root = self.start("crew", "kickoff", key="crew")
+
+    def start(self, kind: str, name: str, key: Any, parent: Optional[Dict[str, Any]] = None, **fields: Any):
+        span = {
+            "run_id": self.run_id, "span_id": uuid.uuid4().hex[:8],
+            "parent_id": (parent or getattr(self, "root", None) or {}).get("span_id"),
+            "kind": kind, "name": name, "start": time.time(), "end": None, "duration_ms": None,
+            "prompt_tokens": 0, "completion_tokens": 0, "bytes_out": 0, "bytes_in": 0, "error": None,
+            **fields,
+        }
+        with self._lock:
+            self.spans.append(span)
+            self._open[key] = span
+        return span
+
+    def finish(self, key: Any, **fields: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            span = self._open.pop(key, None)
+        if span is not None:
+            span.update(fields)
+            span["end"] = time.time()
+            span["duration_ms"] = round((span["end"] - span["start"]) * 1000, 1)
+        return span
+
+    def open_span(self, key: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._open.get(key)
+
+
+class Tracer:
+    """Records crew runs as spans, exports them as JSON lines and Prometheus metrics.
+
+    Task, LLM and tool events arrive through the crewai event bus, possibly on
+    a handler thread pool, and are attributed to the run that owns the task
+    they name. LLM spans are matched by the event's ``call_id`` (falling back
+    to the task, whose LLM calls are sequential), tool spans by tool name and
+    arguments within the task.
+    """
+
+    def __init__(self, log_path: Optional[str]):
+        self.log_path = log_path
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        self._runs_by_task: Dict[str, RunTrace] = {}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[tuple, float]] = defaultdict(lambda: defaultdict(float))
+        self._register_handlers()
+
+    @contextmanager
+    def trace_run(self, crew, topic: str) -> Iterator[RunTrace]:
+        run = RunTrace(topic)
+        with self._lock:
+            for task in crew.tasks:
+                self._runs_by_task[str(task.id)] = run
+        status = "ok"
+        try:
+            yield run
+        except Exception as e:
+            status = "error"
+            run.finish("crew", error=str(e))
+            raise
+        finally:
+            usage = getattr(crew, "usage_metrics", None)
+            root = run.finish("crew") or run.root
+            if usage is not None:
+                root["prompt_tokens"] = getattr(usage, "prompt_tokens", 0)
+                root["completion_tokens"] = getattr(usage, "completion_tokens", 0)
+            with self._lock:
+                for task in crew.tasks:
+                    self._runs_by_task.pop(str(task.id), None)
+            self._export(run, status)
+
+    # -- event bus ---------------------------------------------------------
+
+    def _run_for(self, source: Any, event: Any):
+        """The run and task id an event belongs to, or ``(None, None)`` for events outside a traced run"""
+        task_id = _task_id(source, event)
+        with self._lock:
+            run = self._runs_by_task.get(task_id) if task_id else None
+        return (run, task_id) if run is not None else (None, None)
+
+    @staticmethod
+    def _llm_key(event: Any, task_id: str) -> tuple:
+        return ("llm", getattr(event, "call_id", None) or task_id)
+
+    @staticmethod
+    def _tool_key(event: Any, task_id: str) -> tuple:
+        args = json.dumps(getattr(event, "tool_args", None), sort_keys=True, default=str)
+        return ("tool", task_id, getattr(event, "tool_name", "tool"), args)
+
+    def _register_handlers(self) -> None:
+        bus = crewai_event_bus
+
+        @bus.on(TaskStartedEvent)
+        def on_task_started(source, event):
+            run, task_id = self._run_for(source, event)
+            if run is None:
+                return
+            task = getattr(event, "task", None) or source
+            name = getattr(getattr(task, "agent", None), "role", None) or getattr(event, "agent_role", None) or "task"
+            run.start("task", name, key=("task", task_id))
+
+        def on_task_done(source, event, error=None):
+            run, task_id = self._run_for(source, event)
+            if run is not None:
+                run.finish(("task", task_id), error=error)
+
+        bus.on(TaskCompletedEvent)(lambda source, event: on_task_done(source, event))
+        bus.on(TaskFailedEvent)(lambda source, event: on_task_done(source, event, getattr(event, "error", "failed")))
+
+        @bus.on(LLMCallStartedEvent)
+        def on_llm_started(source, event):
+            run, task_id = self._run_for(source, event)
+            if run is not None:
+                messages = getattr(event, "messages", None)
+                run.start(
+                    "llm", getattr(event, "model", None) or getattr(source, "model", "llm"),
+                    key=self._llm_key(event, task_id), parent=run.open_span(("task", task_id)),
+                    bytes_out=_size(messages), prompt_tokens=_size(messages) // CHARS_PER_TOKEN,
+                    tokens_estimated=True,
+                )
+
+        def on_llm_done(source, event, error=None):
+            run, task_id = self._run_for(source, event)
+            if run is None:
+                return
+            response = getattr(event, "response", None)
+            fields = {"bytes_in": _size(response), "completion_tokens": _size(response) // CHARS_PER_TOKEN}
+            usage = getattr(event, "usage", None) or getattr(response, "usage", None)
+            if usage:
+                usage = usage if isinstance(usage, dict) else vars(usage)
+                fields.update(
+                    prompt_tokens=usage.get("prompt_tokens", 0),
+                    completion_tokens=usage.get("completion_tokens", 0),
+                    tokens_estimated=False,
+                )
+            run.finish(self._llm_key(event, task_id), error=error, **fields)
+
+        bus.on(LLMCallCompletedEvent)(lambda source, event: on_llm_done(source, event))
+        bus.on(LLMCallFailedEvent)(lambda source, event: on_llm_done(source, event, getattr(event, "error", "failed")))
+
+        @bus.on(ToolUsageStartedEvent)
+        def on_tool_started(source, event):
+            run, task_id = self._run_for(source, event)
+            if run is not None:
+                run.start(
+                    "tool", getattr(event, "tool_name", "tool"), key=self._tool_key(event, task_id),
+                    parent=run.open_span(("task", task_id)), bytes_out=_size(getattr(event, "tool_args", None)),
+                )
+
+        def on_tool_done(source, event, error=None):
+            run, task_id = self._run_for(source, event)
+            if run is not None:
+                run.finish(
+                    self._tool_key(event, task_id), error=error, bytes_in=_size(getattr(event, "output", None))
+                )
+
+        bus.on(ToolUsageFinishedEvent)(lambda source, event: on_tool_done(source, event))
+        bus.on(ToolUsageErrorEvent)(lambda source, event: on_tool_done(source, event, str(getattr(event, "error", ""))))
+
+    # -- exporters ---------------------------------------------------------
+
+    def _export(self, run: RunTrace, status: str) -> None:
+        with self._lock:
+            self._metrics["blog_runs_total"][(("status", status),)] += 1
+            for span in run.spans:
+                if span["duration_ms"] is None:
+                    continue
+                labels = (("kind", span["kind"]), ("name", span["name"]))
+                self._metrics["blog_span_seconds_sum"][labels] += span["duration_ms"] / 1000
+                self._metrics["blog_span_seconds_count"][labels] += 1
+                if span["kind"] != "crew":  # the crew span repeats the per-call totals
+                    self._metrics["blog_tokens_total"][labels + (("type", "prompt"),)] += span["prompt_tokens"]
+                    self._metrics["blog_tokens_total"][labels + (("type", "completion"),)] += span["completion_tokens"]
+                    self._metrics["blog_bytes_total"][labels + (("direction", "out"),)] += span["bytes_out"]
+                    self._metrics["blog_bytes_total"][labels + (("direction", "in"),)] += span["bytes_in"]
+
+        if self.log_path:
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                for span in run.spans:
+                    f.write(json.dumps({"topic": run.topic, **span}, default=str) + "\n")
+
+    def prometheus_text(self) -> str:
+        lines = []
+        with self._lock:
+            for metric, series in sorted(self._metrics.items()):
+                lines.append(f"# TYPE {metric} counter")
+                for labels, value in series.items():
+                    rendered = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels)
+                    lines.append(f"{metric}{{{rendered}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int) -> None:
+        """Serve ``/metrics`` in Prometheus text format from a background thread."""
+        tracer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+
+
+def render_waterfall(run: RunTrace) -> None:
+    """Draw a per-run waterfall of crew, task, LLM and tool spans in the current Streamlit container."""
+    import altair as alt
+    import pandas as pd
+    import streamlit as st
+
+    spans = [span for span in run.spans if span["end"] is not None]
+    if not spans:
+        return
+    df = pd.DataFrame([
+        {
+            "span": f"{span['kind']}: {span['name']}"[:40],
+            "start_s": span["start"] - run.started,
+            "end_s": span["end"] - run.started,
+            "kind": span["kind"],
+            "ms": span["duration_ms"],
+            "tokens": span["prompt_tokens"] + span["completion_tokens"],
+        }
+        for span in spans
+    ])
+    chart = alt.Chart(df).mark_bar().encode(
+        x=alt.X("start_s:Q", title="seconds"),
+        x2="end_s:Q",
+        y=alt.Y("span:N", sort=None, title=None),
+        color="kind:N",
+        tooltip=["span", "ms", "tokens"],
+    )
+    st.altair_chart(chart, use_container_width=True)
+    total = next((span for span in spans if span["kind"] == "crew"), None)
+    if total:
+        st.caption(
+            f"Run {run.run_id}: {total['duration_ms'] / 1000:.1f}s, "
+            f"{total['prompt_tokens']} prompt / {total['completion_tokens']} completion tokens"
+        )